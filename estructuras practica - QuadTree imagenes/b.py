@@ -6,220 +6,10 @@ import time
 import json
 from datetime import datetime
 
-class Nodo:
-    """Nodo del QuadTree - Adaptado del código Python"""
-    def __init__(self, info=0, SI=None, SD=None, ID=None, II=None):
-        self.Info = info  # 0=negro, 1=blanco, 2=gris (mixto)
-        self.SI = SI      # Superior Izquierdo
-        self.SD = SD      # Superior Derecho
-        self.ID = ID      # Inferior Derecho
-        self.II = II      # Inferior Izquierdo
-
-class QuadTree:
-    """QuadTree - Adaptado del código C++"""
-    def __init__(self):
-        self.Raiz = None
-        self.A = None  # Matriz de la imagen
-        self.N = 0     # Tamaño de la matriz
-        
-    def Construir(self, matriz):
-        """Construye el QuadTree a partir de una matriz binaria"""
-        self.A = matriz
-        self.N = len(matriz)
-        self.Raiz = None
-        self.Cons(0, 0, self.N-1, self.N-1, self.Raiz)
-        
-    def Cons(self, xi, yi, xf, yf, R):
-        """Construcción recursiva del QuadTree"""
-        # Calcular la suma de colores en la región
-        Color = 0
-        for i in range(xi, xf+1):
-            for j in range(yi, yf+1):
-                Color += self.A[i][j]
-        
-        # Determinar el tipo de nodo
-        area = (xf - xi + 1) * (yf - yi + 1)
-        
-        if Color == 0:  # Todos negros
-            nuevo_nodo = Nodo(0)
-        elif Color == area:  # Todos blancos
-            nuevo_nodo = Nodo(1)
-        else:  # Mixto (gris)
-            nuevo_nodo = Nodo(2)
-            # Dividir recursivamente en 4 cuadrantes
-            mid_x = (xi + xf) // 2
-            mid_y = (yi + yf) // 2
-            
-            # Superior Izquierdo
-            nuevo_nodo.SI = Nodo()
-            self.Cons(xi, yi, mid_x, mid_y, nuevo_nodo.SI)
-            
-            # Inferior Izquierdo
-            nuevo_nodo.II = Nodo()
-            self.Cons(mid_x+1, yi, xf, mid_y, nuevo_nodo.II)
-            
-            # Inferior Derecho
-            nuevo_nodo.ID = Nodo()
-            self.Cons(mid_x+1, mid_y+1, xf, yf, nuevo_nodo.ID)
-            
-            # Superior Derecho
-            nuevo_nodo.SD = Nodo()
-            self.Cons(xi, mid_y+1, mid_x, yf, nuevo_nodo.SD)
-        
-        if R is None:
-            self.Raiz = nuevo_nodo
-        else:
-            # Copiar los valores al nodo de referencia
-            R.Info = nuevo_nodo.Info
-            R.SI = nuevo_nodo.SI
-            R.SD = nuevo_nodo.SD
-            R.ID = nuevo_nodo.ID
-            R.II = nuevo_nodo.II
-    
-    def get_tree_structure(self):
-        """Obtiene la estructura del árbol para visualización"""
-        structure = []
-        self._get_structure_recursive(self.Raiz, 0, 0, self.N, structure)
-        return structure
-    
-    def _get_structure_recursive(self, nodo, x, y, size, structure):
-        """Recursión para obtener la estructura del árbol"""
-        if nodo is None:
-            return
-        
-        structure.append({
-            'x': x,
-            'y': y,
-            'size': size,
-            'info': nodo.Info
-        })
-        
-        if nodo.Info == 2:  # Nodo gris (tiene hijos)
-            half_size = size // 2
-            # Procesar los 4 cuadrantes
-            self._get_structure_recursive(nodo.SI, x, y, half_size, structure)
-            self._get_structure_recursive(nodo.II, x + half_size, y, half_size, structure)
-            self._get_structure_recursive(nodo.ID, x + half_size, y + half_size, half_size, structure)
-            self._get_structure_recursive(nodo.SD, x, y + half_size, half_size, structure)
-    
-    def render_quadtree(self, width, height):
-        """Renderiza el QuadTree como imagen"""
-        img = Image.new('RGB', (width, height), color='white')
-        draw = ImageDraw.Draw(img)
-        
-        structure = self.get_tree_structure()
-        scale_x = width / self.N
-        scale_y = height / self.N
-        
-        for region in structure:
-            x = int(region['x'] * scale_x)
-            y = int(region['y'] * scale_y)
-            size_x = int(region['size'] * scale_x)
-            size_y = int(region['size'] * scale_y)
-            
-            # Determinar color según el tipo de nodo
-            if region['info'] == 0:  # Negro
-                color = (0, 0, 0)
-            elif region['info'] == 1:  # Blanco
-                color = (255, 255, 255)
-            else:  # Gris (no se dibuja, solo sus hijos)
-                continue
-            
-            draw.rectangle([x, y, x + size_x, y + size_y], fill=color)
-        
-        return img
-    
-    def render_with_borders(self, width, height, border_color=(255, 0, 0), border_width=2):
-        """Renderiza el QuadTree con bordes"""
-        img = self.render_quadtree(width, height)
-        draw = ImageDraw.Draw(img)
-        
-        structure = self.get_tree_structure()
-        scale_x = width / self.N
-        scale_y = height / self.N
-        
-        for region in structure:
-            if region['info'] != 2:  # Solo dibujar bordes en nodos hoja
-                x = int(region['x'] * scale_x)
-                y = int(region['y'] * scale_y)
-                size_x = int(region['size'] * scale_x)
-                size_y = int(region['size'] * scale_y)
-                
-                draw.rectangle(
-                    [x, y, x + size_x - 1, y + size_y - 1],
-                    outline=border_color,
-                    width=border_width
-                )
-        
-        return img
-    
-    def count_nodes(self, nodo=None):
-        """Cuenta el número de nodos en el árbol"""
-        if nodo is None:
-            nodo = self.Raiz
-        
-        if nodo is None:
-            return 0
-        
-        if nodo.Info != 2:  # Nodo hoja
-            return 1
-        
-        # Nodo interno, contar recursivamente
-        count = 1
-        if nodo.SI:
-            count += self.count_nodes(nodo.SI)
-        if nodo.SD:
-            count += self.count_nodes(nodo.SD)
-        if nodo.ID:
-            count += self.count_nodes(nodo.ID)
-        if nodo.II:
-            count += self.count_nodes(nodo.II)
-        
-        return count
-    
-    def count_leaves(self, nodo=None):
-        """Cuenta solo las hojas del árbol"""
-        if nodo is None:
-            nodo = self.Raiz
-        
-        if nodo is None:
-            return 0
-        
-        if nodo.Info != 2:  # Nodo hoja
-            return 1
-        
-        # Nodo interno, contar hojas recursivamente
-        count = 0
-        if nodo.SI:
-            count += self.count_leaves(nodo.SI)
-        if nodo.SD:
-            count += self.count_leaves(nodo.SD)
-        if nodo.ID:
-            count += self.count_leaves(nodo.ID)
-        if nodo.II:
-            count += self.count_leaves(nodo.II)
-        
-        return count
-    
-    def get_max_depth(self, nodo=None, depth=0):
-        """Obtiene la profundidad máxima del árbol"""
-        if nodo is None:
-            nodo = self.Raiz
-        
-        if nodo is None or nodo.Info != 2:
-            return depth
-        
-        max_d = depth
-        if nodo.SI:
-            max_d = max(max_d, self.get_max_depth(nodo.SI, depth + 1))
-        if nodo.SD:
-            max_d = max(max_d, self.get_max_depth(nodo.SD, depth + 1))
-        if nodo.ID:
-            max_d = max(max_d, self.get_max_depth(nodo.ID, depth + 1))
-        if nodo.II:
-            max_d = max(max_d, self.get_max_depth(nodo.II, depth + 1))
-        
-        return max_d
+from quadtree import (
+    MatrizBinaria, QuadTree, QuadTreeEtiquetas, QuadTreeCanales,
+    binarizar, etiquetar_imagen
+)
 
 class QuadTreeGUI:
     def __init__(self, root):
@@ -229,12 +19,20 @@ class QuadTreeGUI:
         self.root.configure(bg='#2b2b2b')
         
         # Variables
-        self.original_image = None
-        self.binary_matrix = None
+        self.source_image = None    # Imagen tal como se abrió (cualquier modo)
+        self.image_path = None
+        self.original_image = None  # Imagen de trabajo según el modo de color
+        self.binary_matrix = None   # MatrizBinaria, o una por canal en modo RGB
         self.quadtree = QuadTree()
         self.processing_time = 0
         self.border_color = (255, 0, 0)
         self.threshold = 128  # Umbral para binarización
+        self.binary_display = None  # (x0, y0, escala) de la matriz en su canvas
+        self.canvas_photos = {}     # canvas -> (PhotoImage, item, tamaño, modo)
+        self.canvas_images = {}     # canvas -> imagen PIL mostrada (para redibujar zonas)
+        self.original_thumbnail = None  # (imagen, tamaño, miniatura) de la original
+        self.refresh_pending = False
+        self.brush_zone = None  # Región (filas/columnas) aún sin redibujar tras el pincel
         
         self.setup_styles()
         self.setup_ui()
@@ -258,16 +56,21 @@ class QuadTreeGUI:
         file_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Archivo", menu=file_menu)
         file_menu.add_command(label="Cargar Imagen", command=self.load_image)
+        file_menu.add_command(label="Abrir Flujo Progresivo", command=self.load_progressive)
         file_menu.add_command(label="Guardar QuadTree", command=self.save_quadtree)
         file_menu.add_command(label="Guardar Comparación", command=self.save_comparison)
         file_menu.add_separator()
         file_menu.add_command(label="Exportar Estadísticas", command=self.export_stats)
+        file_menu.add_command(label="Exportar SVG", command=lambda: self.export_vector('svg'))
+        file_menu.add_command(label="Exportar GeoJSON", command=lambda: self.export_vector('geojson'))
+        file_menu.add_command(label="Exportar Flujo Progresivo", command=self.export_progressive)
         file_menu.add_separator()
         file_menu.add_command(label="Salir", command=self.root.quit)
         
         tools_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Herramientas", menu=tools_menu)
         tools_menu.add_command(label="Mostrar Árbol ASCII", command=self.show_tree_ascii)
+        tools_menu.add_command(label="Actualizar Estadísticas", command=self.update_stats_display)
         tools_menu.add_command(label="Cambiar Color de Bordes", command=self.change_border_color)
         
         # Frame principal
@@ -305,6 +108,15 @@ class QuadTreeGUI:
         self.img_info = ttk.Label(load_frame, text="Sin imagen", foreground='gray')
         self.img_info.pack(pady=2)
         
+        ttk.Label(load_frame, text="Modo de color:").pack(anchor=tk.W, pady=(10, 0))
+        self.color_mode = tk.StringVar(value='gray')
+        ttk.Radiobutton(load_frame, text="Escala de grises", variable=self.color_mode,
+                       value='gray', command=self.on_color_mode_change).pack(anchor=tk.W)
+        ttk.Radiobutton(load_frame, text="Por canal (RGB)", variable=self.color_mode,
+                       value='channels', command=self.on_color_mode_change).pack(anchor=tk.W)
+        ttk.Radiobutton(load_frame, text="Etiquetas / Paleta", variable=self.color_mode,
+                       value='labels', command=self.on_color_mode_change).pack(anchor=tk.W)
+        
         # Parámetros de binarización
         params_frame = ttk.LabelFrame(parent, text="Binarización", padding="10")
         params_frame.pack(fill=tk.X, pady=5)
@@ -358,6 +170,34 @@ class QuadTreeGUI:
         self.border_label = ttk.Label(border_container, text="2", width=6)
         self.border_label.pack(side=tk.RIGHT, padx=5)
         
+        # Pincel para editar la matriz binaria
+        brush_frame = ttk.LabelFrame(parent, text="Pincel", padding="10")
+        brush_frame.pack(fill=tk.X, pady=5)
+        
+        self.brush_enabled = tk.BooleanVar(value=False)
+        ttk.Checkbutton(brush_frame, text="Editar Matriz Binaria", 
+                       variable=self.brush_enabled).pack(anchor=tk.W)
+        
+        self.brush_color = tk.IntVar(value=0)
+        ttk.Radiobutton(brush_frame, text="Negro", 
+                       variable=self.brush_color, value=0).pack(anchor=tk.W)
+        ttk.Radiobutton(brush_frame, text="Blanco", 
+                       variable=self.brush_color, value=1).pack(anchor=tk.W)
+        
+        ttk.Label(brush_frame, text="Tamaño:").pack(anchor=tk.W, pady=(10, 0))
+        brush_container = ttk.Frame(brush_frame)
+        brush_container.pack(fill=tk.X, pady=2)
+        
+        self.brush_size_var = tk.IntVar(value=4)
+        ttk.Scale(brush_container, from_=1, to=32, 
+                 variable=self.brush_size_var, 
+                 orient=tk.HORIZONTAL,
+                 command=lambda x: self.brush_label.config(
+                     text=str(self.brush_size_var.get()))).pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
+        self.brush_label = ttk.Label(brush_container, text="4", width=6)
+        self.brush_label.pack(side=tk.RIGHT, padx=5)
+        
         # Estadísticas
         stats_frame = ttk.LabelFrame(parent, text="Estadísticas del QuadTree", padding="10")
         stats_frame.pack(fill=tk.BOTH, expand=True, pady=5)
@@ -394,6 +234,9 @@ class QuadTreeGUI:
         
         self.binary_canvas = tk.Canvas(middle_panel, bg='#1e1e1e')
         self.binary_canvas.pack(fill=tk.BOTH, expand=True)
+        self.binary_canvas.bind("<Button-1>", self.on_brush)
+        self.binary_canvas.bind("<B1-Motion>", self.on_brush)
+        self.binary_canvas.bind("<ButtonRelease-1>", self.on_brush_release)
         
         # QuadTree
         right_panel = ttk.LabelFrame(images_container, text="QuadTree")
@@ -442,20 +285,14 @@ class QuadTreeGUI:
                 self.status_bar.config(text="Cargando imagen...")
                 self.root.update()
                 
-                self.original_image = Image.open(file_path)
-                
-                # Convertir a escala de grises
-                self.original_image = self.original_image.convert('L')
+                # Image.open solo lee la cabecera: se decodifica en prepare_image
+                self.source_image = Image.open(file_path)
+                self.image_path = file_path
                 
-                # Redimensionar a potencia de 2 para QuadTree
-                size = max(self.original_image.size)
-                power_of_2 = 2 ** int(np.ceil(np.log2(size)))
-                power_of_2 = min(power_of_2, 512)  # Limitar tamaño máximo
-                
-                self.original_image = self.original_image.resize(
-                    (power_of_2, power_of_2), 
-                    Image.Resampling.LANCZOS
-                )
+                # Imagen de trabajo según el modo de color
+                # (se usan los píxeles originales: el QuadTree admite
+                # cualquier tamaño H x W, sin redimensionar)
+                self.prepare_image()
                 
                 w, h = self.original_image.size
                 self.img_info.config(text=f"{w}x{h} px")
@@ -469,98 +306,294 @@ class QuadTreeGUI:
                 messagebox.showerror("Error", f"No se pudo cargar la imagen: {str(e)}")
                 self.status_bar.config(text="Error al cargar imagen")
     
+    def prepare_image(self):
+        """Convierte la imagen abierta al modo de color elegido.
+        
+        Image.open deja el archivo abierto hasta decodificar la imagen (en
+        Windows, bloqueado): al terminar, source_image queda en memoria o
+        cerrada (None) y se vuelve a abrir si otro modo la necesita."""
+        mode = self.color_mode.get()
+        if self.source_image is None:
+            self.source_image = Image.open(self.image_path)
+        
+        if mode == 'gray' and self.source_image.format == 'JPEG':
+            # JPEG: decodificar directamente la luminancia (draft 'L' al tamaño
+            # original) sin pasar por RGB; el archivo se cierra al salir y el
+            # color se lee de nuevo solo si luego se cambia de modo
+            with self.source_image as image:
+                image.draft('L', image.size)
+                self.original_image = image.convert('L')
+            self.source_image = None
+            return
+        
+        if getattr(self.source_image, 'fp', None) is not None:
+            # Aún sin decodificar: copy() lee los píxeles (el primer cuadro en
+            # GIF) y el archivo original se cierra
+            fuente = self.source_image
+            self.source_image = fuente.copy()
+            fuente.close()
+        
+        if mode == 'gray':
+            self.original_image = self.source_image.convert('L')
+        elif mode == 'channels':
+            self.original_image = self.source_image.convert('RGB')
+        else:
+            # Etiquetas: se conserva el modo (paleta, IDs en gris o colores)
+            self.original_image = self.source_image
+    
+    def on_color_mode_change(self):
+        """Reconstruye el árbol al cambiar el modo de color"""
+        if self.image_path is None:
+            return
+        self.prepare_image()
+        self.display_original()
+        self.process_quadtree()
+    
+    def is_binary_tree(self):
+        """True si el árbol actual es un QuadTree binario (escala de grises)"""
+        return type(self.quadtree) is QuadTree
+    
     def binarize_image(self):
-        """Convierte la imagen a matriz binaria"""
+        """Convierte la imagen a matriz binaria (una por canal en modo RGB)"""
         if self.original_image is None:
             return None
         
         img_array = np.array(self.original_image)
         method = self.binarize_method.get()
         
-        if method == 'threshold':
-            threshold = self.threshold_var.get()
-            binary = (img_array > threshold).astype(int)
-        elif method == 'otsu':
-            # Método de Otsu
-            threshold = self.otsu_threshold(img_array)
-            self.threshold_var.set(int(threshold))
-            self.threshold_label.config(text=str(int(threshold)))
-            binary = (img_array > threshold).astype(int)
-        elif method == 'mean':
-            threshold = np.mean(img_array)
+        if img_array.ndim == 3:
+            # Cada canal con su propio umbral ('otsu' y 'mean' lo calculan por canal)
+            return [
+                binarizar(img_array[..., canal], method, self.threshold_var.get())[0]
+                for canal in range(3)
+            ]
+        
+        binary, threshold = binarizar(img_array, method, self.threshold_var.get())
+        if method != 'threshold':
+            # Otsu y media calculan su propio umbral: reflejarlo en el control
             self.threshold_var.set(int(threshold))
             self.threshold_label.config(text=str(int(threshold)))
-            binary = (img_array > threshold).astype(int)
         
         return binary
     
-    def otsu_threshold(self, image):
-        """Calcula el umbral óptimo usando el método de Otsu"""
-        histogram, bin_edges = np.histogram(image, bins=256, range=(0, 256))
-        histogram = histogram.astype(float)
-        
-        # Normalizar histograma
-        histogram /= histogram.sum()
-        
-        # Calcular umbrales
-        bins = np.arange(256)
-        
-        # Pesos acumulados
-        weight_bg = np.cumsum(histogram)
-        weight_fg = 1 - weight_bg
-        
-        # Medias acumuladas
-        mean_bg = np.cumsum(histogram * bins)
-        
-        # Evitar división por cero
-        with np.errstate(divide='ignore', invalid='ignore'):
-            mean_bg = mean_bg / weight_bg
-            mean_fg = (np.sum(histogram * bins) - np.cumsum(histogram * bins)) / weight_fg
-        
-        # Varianza entre clases
-        variance_between = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+    def display_size(self, size, canvas):
+        """Tamaño con que una imagen de size = (ancho, alto) entra en el
+        canvas sin agrandarse (None si el canvas aún no tiene tamaño)"""
+        canvas_width = canvas.winfo_width()
+        canvas_height = canvas.winfo_height()
+        if canvas_width <= 1 or canvas_height <= 1:
+            return None
         
-        # Encontrar el umbral óptimo
-        threshold = np.argmax(variance_between)
+        width, height = size
+        scale = min(canvas_width / width, canvas_height / height, 1.0)
+        return max(1, round(width * scale)), max(1, round(height * scale))
+    
+    def fit_to_canvas(self, image, canvas, resample):
+        """Imagen reducida al tamaño de visualización del canvas.
+        
+        Devuelve una imagen nueva sin copiar antes la de tamaño completo; con
+        filtros suaves, reducing_gap reduce primero por un factor entero
+        (barato) y solo el último tramo usa el filtro pedido."""
+        size = self.display_size(image.size, canvas)
+        if size is None or size == image.size:
+            return None if size is None else image
+        gap = None if resample == Image.Resampling.NEAREST else 3.0
+        return image.resize(size, resample, reducing_gap=gap)
+    
+    def show_on_canvas(self, canvas, image):
+        """Muestra una imagen ya reducida, centrada en el canvas.
+        
+        Si el PhotoImage anterior del canvas tiene el mismo tamaño y modo se
+        actualiza con paste en lugar de crear otro."""
+        mode = 'L' if image.mode in ('1', 'L') else 'RGB'
+        if image.mode != mode:
+            image = image.convert(mode)
+        center = (canvas.winfo_width() // 2, canvas.winfo_height() // 2)
+        
+        self.canvas_images[canvas] = image
+        
+        previous = self.canvas_photos.get(canvas)
+        if previous is not None and previous[2:] == (image.size, mode):
+            photo, item = previous[:2]
+            photo.paste(image)
+            canvas.coords(item, *center)
+            return
         
-        return threshold
+        photo = ImageTk.PhotoImage(image)
+        canvas.delete("all")
+        item = canvas.create_image(*center, image=photo)
+        self.canvas_photos[canvas] = (photo, item, image.size, mode)
+    
+    def paste_on_canvas(self, canvas, patch, position):
+        """Pega un recorte sobre la imagen mostrada en el canvas y actualiza
+        su PhotoImage, sin volver a generar la imagen completa"""
+        image = self.canvas_images[canvas]
+        image.paste(patch.convert(image.mode), position)
+        self.canvas_photos[canvas][0].paste(image)
+    
+    def clear_canvas(self, canvas):
+        """Borra el canvas y olvida su PhotoImage"""
+        canvas.delete("all")
+        self.canvas_photos.pop(canvas, None)
+        self.canvas_images.pop(canvas, None)
     
     def display_original(self):
         """Muestra la imagen original"""
         if self.original_image:
-            canvas_width = self.original_canvas.winfo_width()
-            canvas_height = self.original_canvas.winfo_height()
+            size = self.display_size(self.original_image.size, self.original_canvas)
+            if size is None:
+                return
             
-            if canvas_width > 1 and canvas_height > 1:
-                img_copy = self.original_image.copy()
-                img_copy.thumbnail((canvas_width, canvas_height), Image.Resampling.LANCZOS)
-                
-                self.original_photo = ImageTk.PhotoImage(img_copy)
-                self.original_canvas.delete("all")
-                self.original_canvas.create_image(
-                    canvas_width // 2, canvas_height // 2,
-                    image=self.original_photo
+            # Miniatura en caché mientras no cambien la imagen ni el tamaño
+            cached = self.original_thumbnail
+            if cached is None or cached[0] is not self.original_image or cached[1] != size:
+                thumbnail = self.fit_to_canvas(
+                    self.original_image, self.original_canvas, Image.Resampling.LANCZOS
                 )
+                self.original_thumbnail = (self.original_image, size, thumbnail)
+            
+            self.show_on_canvas(self.original_canvas, self.original_thumbnail[2])
     
-    def display_binary(self):
-        """Muestra la matriz binaria"""
+    def matrix_image(self):
+        """Imagen de la matriz con que se construyó el árbol (None si no hay)"""
+        if isinstance(self.quadtree, QuadTreeEtiquetas):
+            return self.quadtree.a_imagen() if self.quadtree.A is not None else None
+        if isinstance(self.binary_matrix, list):
+            return Image.merge('RGB', [m.a_imagen().convert('L') for m in self.binary_matrix])
         if self.binary_matrix is not None:
-            # Crear imagen desde la matriz binaria
-            binary_img = Image.fromarray((self.binary_matrix * 255).astype(np.uint8), mode='L')
-            
-            canvas_width = self.binary_canvas.winfo_width()
-            canvas_height = self.binary_canvas.winfo_height()
-            
-            if canvas_width > 1 and canvas_height > 1:
-                img_copy = binary_img.copy()
-                img_copy.thumbnail((canvas_width, canvas_height), Image.Resampling.NEAREST)
-                
-                self.binary_photo = ImageTk.PhotoImage(img_copy)
-                self.binary_canvas.delete("all")
-                self.binary_canvas.create_image(
-                    canvas_width // 2, canvas_height // 2,
-                    image=self.binary_photo
-                )
+            # Desde la matriz binaria (modo '1', sin desempaquetar)
+            return self.binary_matrix.a_imagen()
+        return None
+    
+    def nearest_indices(self, size, total, start=0, stop=None):
+        """Fila o columna de la matriz (de largo total) que muestra cada
+        píxel start..stop-1 de una vista de largo size (vecino más cercano)"""
+        stop = size if stop is None else stop
+        return ((np.arange(start, stop) + 0.5) * total / size).astype(np.int64)
+    
+    def display_binary(self):
+        """Muestra la matriz binaria (o el mapa de etiquetas)"""
+        if isinstance(self.binary_matrix, MatrizBinaria):
+            # Muestreo directo de los bits, igual que en redraw_binary_zone
+            H, W = self.binary_matrix.shape
+            size = self.display_size((W, H), self.binary_canvas)
+            if size is None:
+                return
+            img_display = self.binary_matrix.muestrear(
+                self.nearest_indices(size[1], H), self.nearest_indices(size[0], W)
+            )
+        else:
+            binary_img = self.matrix_image()
+            if binary_img is None:
+                return
+            img_display = self.fit_to_canvas(
+                binary_img, self.binary_canvas, Image.Resampling.NEAREST
+            )
+            if img_display is None:
+                return
+            W = binary_img.width
+        
+        self.binary_display = (
+            (self.binary_canvas.winfo_width() - img_display.width) // 2,
+            (self.binary_canvas.winfo_height() - img_display.height) // 2,
+            img_display.width / W
+        )
+        self.show_on_canvas(self.binary_canvas, img_display)
+    
+    def on_brush(self, event):
+        """Pinta sobre la matriz binaria con el pincel"""
+        if not self.brush_enabled.get() or self.binary_display is None:
+            return
+        if self.quadtree.Raiz is None or not self.is_binary_tree():
+            return
+        
+        # Convertir coordenadas del canvas a fila/columna de la matriz
+        x0, y0, escala = self.binary_display
+        fila = int((event.y - y0) / escala)
+        columna = int((event.x - x0) / escala)
+        
+        radio = self.brush_size_var.get() // 2
+        H, W = self.binary_matrix.shape
+        xi, yi = max(fila - radio, 0), max(columna - radio, 0)
+        xf, yf = min(fila + radio, H - 1), min(columna + radio, W - 1)
+        if xi > xf or yi > yf:
+            return
+        
+        # binary_matrix y el QuadTree comparten la misma MatrizBinaria
+        valor = self.brush_color.get()
+        zona = self.quadtree.set_rect(xi, yi, xf, yf, valor)
+        if zona is None:
+            return
+        
+        # Agrupar los redibujados mientras el ratón se mueve (una sola zona)
+        if self.brush_zone is not None:
+            zxi, zyi, zxf, zyf = self.brush_zone
+            zona = (min(zxi, zona[0]), min(zyi, zona[1]), max(zxf, zona[2]), max(zyf, zona[3]))
+        self.brush_zone = zona
+        if not self.refresh_pending:
+            self.refresh_pending = True
+            self.root.after_idle(self.refresh_after_brush)
+    
+    def refresh_after_brush(self):
+        """Redibuja solo la zona que cambió con el pincel, en la matriz
+        binaria y en el QuadTree (todo, si aún no hay imagen mostrada)"""
+        self.refresh_pending = False
+        zona, self.brush_zone = self.brush_zone, None
+        if zona is None:
+            return
+        if not self.redraw_binary_zone(zona):
+            self.display_binary()
+        if not self.redraw_tree_zone(zona):
+            self.update_display()
+    
+    def redraw_binary_zone(self, zona):
+        """Vuelve a muestrear la zona (filas xi..xf, columnas yi..yf) de la
+        matriz binaria mostrada; False si no hay imagen que actualizar"""
+        image = self.canvas_images.get(self.binary_canvas)
+        if image is None or self.binary_display is None:
+            return False
+        
+        xi, yi, xf, yf = zona
+        H, W = self.binary_matrix.shape
+        width, height = image.size
+        
+        # Píxeles de pantalla que pueden mostrar algún píxel de la zona
+        x0, y0 = int(yi * width / W), int(xi * height / H)
+        x1 = min(int((yf + 1) * width / W) + 1, width)
+        y1 = min(int((xf + 1) * height / H) + 1, height)
+        
+        patch = self.binary_matrix.muestrear(
+            self.nearest_indices(height, H, y0, y1), self.nearest_indices(width, W, x0, x1)
+        )
+        self.paste_on_canvas(self.binary_canvas, patch, (x0, y0))
+        return True
+    
+    def redraw_tree_zone(self, zona):
+        """Redibuja solo los nodos de la zona (filas xi..xf, columnas yi..yf)
+        en la imagen del QuadTree mostrada; False si no hay imagen del tamaño
+        actual que actualizar"""
+        image = self.canvas_images.get(self.quadtree_canvas)
+        size = self.display_size((self.quadtree.W, self.quadtree.H), self.quadtree_canvas)
+        if image is None or image.size != size:
+            return False
+        
+        width, height = size
+        box = self.quadtree.caja_en_pixeles(*zona, width, height)
+        if self.show_borders.get():
+            patch = self.quadtree.render_with_borders(
+                width, height, self.border_color, self.border_width_var.get(), box
+            )
+        else:
+            patch = self.quadtree.render_quadtree(width, height, box)
+        
+        self.paste_on_canvas(self.quadtree_canvas, patch, box[:2])
+        return True
+    
+    def on_brush_release(self, event):
+        """Actualiza las estadísticas al soltar el pincel (las componentes
+        se recalculan solo con Herramientas → Actualizar Estadísticas)"""
+        if self.brush_enabled.get() and self.quadtree.Raiz is not None:
+            self.update_stats_display(components=False)
     
     def process_quadtree(self):
         """Procesa la imagen con el QuadTree"""
@@ -573,18 +606,26 @@ class QuadTreeGUI:
             
             start_time = time.time()
             
-            # Binarizar imagen
-            self.binary_matrix = self.binarize_image()
+            mode = self.color_mode.get()
+            if mode == 'labels':
+                # Cada valor (índice de paleta, ID o color) es una clase
+                self.binary_matrix = None
+                labels, palette = etiquetar_imagen(self.original_image)
+                self.quadtree = QuadTreeEtiquetas()
+                self.quadtree.Construir(labels, palette)
+            else:
+                # Binarizar imagen y construir el QuadTree (uno por canal en RGB)
+                self.binary_matrix = self.binarize_image()
+                self.quadtree = QuadTreeCanales() if mode == 'channels' else QuadTree()
+                self.quadtree.Construir(self.binary_matrix)
+            
+            self.processing_time = time.time() - start_time
+            
             self.display_binary()
             
             # Mostrar matriz en la pestaña
             self.display_matrix_data()
             
-            # Construir QuadTree
-            self.quadtree.Construir(self.binary_matrix.tolist())
-            
-            self.processing_time = time.time() - start_time
-            
             self.update_stats_display()
             self.update_display()
             
@@ -601,19 +642,37 @@ class QuadTreeGUI:
         """Muestra la matriz binaria como texto"""
         self.matrix_text.delete(1.0, tk.END)
         
-        if self.binary_matrix is None:
+        if isinstance(self.quadtree, QuadTreeEtiquetas):
+            matrix, title = self.quadtree.A, "Matriz de Etiquetas"
+        elif isinstance(self.binary_matrix, list):
+            self.matrix_text.insert(tk.END, "Modo por canal: hay una matriz binaria por canal\n"
+                                            "(ver la imagen combinada en Comparación)")
+            return
+        elif self.binary_matrix is not None:
+            matrix, title = self.binary_matrix, "Matriz Binaria"
+        else:
             self.matrix_text.insert(tk.END, "No hay matriz binaria disponible")
             return
         
-        N = len(self.binary_matrix)
-        self.matrix_text.insert(tk.END, f"Matriz Binaria {N}x{N}\n")
-        self.matrix_text.insert(tk.END, "=" * (N * 2 + 10) + "\n\n")
+        H, W = matrix.shape
+        self.matrix_text.insert(tk.END, f"{title} {W}x{H}\n")
+        
+        # Las imágenes ya no se reducen a 512x512: limitar el texto mostrado
+        max_lado = 512
+        if H > max_lado or W > max_lado:
+            self.matrix_text.insert(
+                tk.END, f"(mostrando las primeras {min(H, max_lado)} filas "
+                        f"y {min(W, max_lado)} columnas)\n"
+            )
+        self.matrix_text.insert(tk.END, "=" * (min(W, max_lado) * 2 + 10) + "\n\n")
         
         # Mostrar matriz
-        for i in range(N):
-            for j in range(N):
-                self.matrix_text.insert(tk.END, str(self.binary_matrix[i][j]) + " ")
-            self.matrix_text.insert(tk.END, "\n")
+        if isinstance(matrix, MatrizBinaria):
+            filas = matrix.a_array(max_lado, max_lado)
+        else:
+            filas = matrix[:max_lado, :max_lado]
+        for fila in filas:
+            self.matrix_text.insert(tk.END, " ".join(str(v) for v in fila) + " \n")
     
     def update_display(self):
         """Actualiza la visualización del QuadTree"""
@@ -621,30 +680,22 @@ class QuadTreeGUI:
             return
         
         try:
-            size = len(self.binary_matrix)
-            
-            if self.show_borders.get():
-                quad_img = self.quadtree.render_with_borders(
-                    size, size, 
-                    self.border_color, 
-                    self.border_width_var.get()
-                )
-            else:
-                quad_img = self.quadtree.render_quadtree(size, size)
-            
-            canvas_width = self.quadtree_canvas.winfo_width()
-            canvas_height = self.quadtree_canvas.winfo_height()
+            # Renderizar directamente al tamaño de visualización (el árbol
+            # escala sus regiones): sin imagen intermedia de tamaño completo
+            size = self.display_size((self.quadtree.W, self.quadtree.H), self.quadtree_canvas)
             
-            if canvas_width > 1 and canvas_height > 1:
-                quad_display = quad_img.copy()
-                quad_display.thumbnail((canvas_width, canvas_height), Image.Resampling.NEAREST)
+            if size is not None:
+                width, height = size
+                if self.show_borders.get():
+                    quad_img = self.quadtree.render_with_borders(
+                        width, height, 
+                        self.border_color, 
+                        self.border_width_var.get()
+                    )
+                else:
+                    quad_img = self.quadtree.render_quadtree(width, height)
                 
-                self.quadtree_photo = ImageTk.PhotoImage(quad_display)
-                self.quadtree_canvas.delete("all")
-                self.quadtree_canvas.create_image(
-                    canvas_width // 2, canvas_height // 2,
-                    image=self.quadtree_photo
-                )
+                self.show_on_canvas(self.quadtree_canvas, quad_img)
             
             # Actualizar label de borde
             self.border_label.config(text=str(self.border_width_var.get()))
@@ -652,23 +703,34 @@ class QuadTreeGUI:
         except Exception as e:
             messagebox.showerror("Error", f"Error al mostrar: {str(e)}")
     
-    def update_stats_display(self):
-        """Actualiza el panel de estadísticas"""
+    def update_stats_display(self, components=True):
+        """Actualiza el panel de estadísticas (components=False omite las
+        regiones conexas, que recorren todas las hojas)"""
         self.stats_text.delete(1.0, tk.END)
         
         if self.quadtree.Raiz is None:
             self.stats_text.insert(tk.END, "Sin datos\n\nProcesa una imagen para\nver estadísticas.")
             return
         
-        num_nodes = self.quadtree.count_nodes()
-        num_leaves = self.quadtree.count_leaves()
+        if not self.is_binary_tree():
+            self.stats_text.insert(tk.END, self.color_stats_text())
+            return
+        
         max_depth = self.quadtree.get_max_depth()
         
-        # Contar tipos de nodos
-        structure = self.quadtree.get_tree_structure()
-        black_nodes = sum(1 for s in structure if s['info'] == 0)
-        white_nodes = sum(1 for s in structure if s['info'] == 1)
-        gray_nodes = sum(1 for s in structure if s['info'] == 2)
+        # Tipos de nodos (caché mantenida por el QuadTree)
+        black_nodes = self.quadtree.conteo[0]
+        white_nodes = self.quadtree.conteo[1]
+        gray_nodes = self.quadtree.conteo[2]
+        num_nodes = black_nodes + white_nodes + gray_nodes
+        num_leaves = black_nodes + white_nodes
+        
+        if components:
+            components = self.quadtree.get_components()
+            largest = max((c['area'] for c in components), default=0)
+            regions_info = f"Componentes: {len(components)}\n  Mayor área: {largest} px"
+        else:
+            regions_info = "Sin actualizar (Herramientas →\n  Actualizar Estadísticas)"
         
         stats_info = f"""═══════════════════════════════
 ESTADÍSTICAS DEL QUADTREE
@@ -691,8 +753,11 @@ TIPOS DE NODO:
 PROFUNDIDAD:
   Máxima: {max_depth}
 
+REGIONES NEGRAS:
+  {regions_info}
+
 MATRIZ:
-  Tamaño: {len(self.binary_matrix)}x{len(self.binary_matrix)}
+  Tamaño: {self.quadtree.W}x{self.quadtree.H}
   Umbral: {self.threshold_var.get()}
   Método: {self.binarize_method.get().title()}
 
@@ -704,6 +769,48 @@ RENDIMIENTO:
         
         self.stats_text.insert(tk.END, stats_info)
     
+    def color_stats_text(self):
+        """Texto de estadísticas de los modos por canal y de etiquetas"""
+        stats = self.quadtree.get_stats()
+        
+        if isinstance(self.quadtree, QuadTreeEtiquetas):
+            detail = f"""ETIQUETAS:
+  Distintas: {stats['labels']}
+  Nodos mixtos: {stats['gray_nodes']}
+"""
+            mode = "Etiquetas / Paleta"
+        else:
+            detail = "HOJAS POR CANAL:\n" + "".join(
+                f"  {name}: {channel['leaf_nodes']} "
+                f"(negras {channel['black_nodes']}, blancas {channel['white_nodes']})\n"
+                for name, channel in stats['channels'].items()
+            )
+            mode = "Por canal (RGB)"
+        
+        return f"""═══════════════════════════════
+ESTADÍSTICAS DEL QUADTREE
+═══════════════════════════════
+
+Modo: {mode}
+
+NODOS:
+  Total: {stats['total_nodes']}
+  Hojas: {stats['leaf_nodes']}
+  Internos: {stats['total_nodes'] - stats['leaf_nodes']}
+
+{detail}
+PROFUNDIDAD:
+  Máxima: {stats['max_depth']}
+
+MATRIZ:
+  Tamaño: {self.quadtree.W}x{self.quadtree.H}
+
+RENDIMIENTO:
+  Tiempo: {self.processing_time:.3f}s
+
+═══════════════════════════════
+"""
+    
     def on_threshold_change(self, value):
         """Maneja cambios en el umbral"""
         self.threshold_label.config(text=str(int(float(value))))
@@ -730,14 +837,14 @@ RENDIMIENTO:
         
         if file_path:
             try:
-                size = len(self.binary_matrix)
+                width, height = self.quadtree.W, self.quadtree.H
                 
                 if self.show_borders.get():
                     img = self.quadtree.render_with_borders(
-                        size, size, self.border_color, self.border_width_var.get()
+                        width, height, self.border_color, self.border_width_var.get()
                     )
                 else:
-                    img = self.quadtree.render_quadtree(size, size)
+                    img = self.quadtree.render_quadtree(width, height)
                 
                 img.save(file_path)
                 messagebox.showinfo("Éxito", f"QuadTree guardado en: {file_path}")
@@ -749,6 +856,10 @@ RENDIMIENTO:
         if self.quadtree.Raiz is None:
             messagebox.showwarning("Advertencia", "No hay QuadTree para guardar")
             return
+        binary_img = self.matrix_image()
+        if self.original_image is None or binary_img is None:
+            messagebox.showwarning("Advertencia", "No hay imagen original para comparar")
+            return
         
         file_path = filedialog.asksaveasfilename(
             defaultextension=".png",
@@ -757,10 +868,10 @@ RENDIMIENTO:
         
         if file_path:
             try:
-                size = len(self.binary_matrix)
+                width, height = binary_img.size
                 
                 # Crear imagen comparativa
-                comparison = Image.new('RGB', (size * 3 + 40, size + 80), color='white')
+                comparison = Image.new('RGB', (width * 3 + 40, height + 80), color='white')
                 draw = ImageDraw.Draw(comparison)
                 
                 # Imagen original
@@ -768,19 +879,18 @@ RENDIMIENTO:
                 comparison.paste(orig_gray, (10, 60))
                 
                 # Matriz binaria
-                binary_img = Image.fromarray((self.binary_matrix * 255).astype(np.uint8), mode='L')
                 binary_rgb = binary_img.convert('RGB')
-                comparison.paste(binary_rgb, (size + 20, 60))
+                comparison.paste(binary_rgb, (width + 20, 60))
                 
                 # QuadTree
                 if self.show_borders.get():
                     quad_img = self.quadtree.render_with_borders(
-                        size, size, self.border_color, self.border_width_var.get()
+                        width, height, self.border_color, self.border_width_var.get()
                     )
                 else:
-                    quad_img = self.quadtree.render_quadtree(size, size)
+                    quad_img = self.quadtree.render_quadtree(width, height)
                 
-                comparison.paste(quad_img, (size * 2 + 30, 60))
+                comparison.paste(quad_img, (width * 2 + 30, 60))
                 
                 # Añadir texto
                 try:
@@ -792,9 +902,12 @@ RENDIMIENTO:
                 
                 draw.text((10, 10), "QuadTree - Comparación", fill='black', font=font_title)
                 draw.text((10, 40), "Original", fill='black', font=font)
-                draw.text((size + 20, 40), f"Binaria (Umbral={self.threshold_var.get()})", 
-                         fill='black', font=font)
-                draw.text((size * 2 + 30, 40), f"QuadTree ({self.quadtree.count_leaves()} hojas)", 
+                if isinstance(self.quadtree, QuadTreeEtiquetas):
+                    binary_title = f"Etiquetas ({self.quadtree.get_stats()['labels']} clases)"
+                else:
+                    binary_title = f"Binaria (Umbral={self.threshold_var.get()})"
+                draw.text((width + 20, 40), binary_title, fill='black', font=font)
+                draw.text((width * 2 + 30, 40), f"QuadTree ({self.quadtree.count_leaves()} hojas)", 
                          fill='black', font=font)
                 
                 comparison.save(file_path)
@@ -815,30 +928,30 @@ RENDIMIENTO:
         
         if file_path:
             try:
-                structure = self.quadtree.get_tree_structure()
-                black_nodes = sum(1 for s in structure if s['info'] == 0)
-                white_nodes = sum(1 for s in structure if s['info'] == 1)
-                gray_nodes = sum(1 for s in structure if s['info'] == 2)
-                
                 data = {
                     'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
                     'implementation': 'C++ Adapted QuadTree',
-                    'image_size': f"{len(self.binary_matrix)}x{len(self.binary_matrix)}",
+                    'image_size': f"{self.quadtree.W}x{self.quadtree.H}",
                     'parameters': {
                         'threshold': self.threshold_var.get(),
                         'binarization_method': self.binarize_method.get()
                     },
-                    'statistics': {
-                        'total_nodes': self.quadtree.count_nodes(),
-                        'leaf_nodes': self.quadtree.count_leaves(),
-                        'max_depth': self.quadtree.get_max_depth(),
-                        'black_nodes': black_nodes,
-                        'white_nodes': white_nodes,
-                        'gray_nodes': gray_nodes
-                    },
+                    'color_mode': self.color_mode.get(),
+                    'statistics': self.quadtree.get_stats(),
                     'processing_time': self.processing_time
                 }
                 
+                if self.is_binary_tree():
+                    data['black_components'] = [
+                        {
+                            'label': c['etiqueta'],
+                            'area': c['area'],
+                            'bbox': list(c['bbox']),
+                            'centroid': list(c['centroide'])
+                        }
+                        for c in self.quadtree.get_components()
+                    ]
+                
                 with open(file_path, 'w', encoding='utf-8') as f:
                     json.dump(data, f, indent=4, ensure_ascii=False)
                 
@@ -846,6 +959,104 @@ RENDIMIENTO:
             except Exception as e:
                 messagebox.showerror("Error", f"No se pudo exportar: {str(e)}")
     
+    def export_vector(self, formato):
+        """Exporta las regiones negras como polígonos (SVG o GeoJSON)"""
+        if self.quadtree.Raiz is None:
+            messagebox.showwarning("Advertencia", "No hay QuadTree para exportar")
+            return
+        if not self.is_binary_tree():
+            messagebox.showwarning("Advertencia", "Disponible solo en modo escala de grises")
+            return
+        
+        if formato == 'svg':
+            file_path = filedialog.asksaveasfilename(
+                defaultextension=".svg",
+                filetypes=[("SVG", "*.svg")]
+            )
+            partes = self.quadtree.iter_svg
+        else:
+            file_path = filedialog.asksaveasfilename(
+                defaultextension=".geojson",
+                filetypes=[("GeoJSON", "*.geojson"), ("JSON", "*.json")]
+            )
+            partes = self.quadtree.iter_geojson
+        
+        if file_path:
+            try:
+                # Se escribe por partes, sin armar el documento completo
+                with open(file_path, 'w', encoding='utf-8') as f:
+                    f.writelines(partes())
+                
+                messagebox.showinfo("Éxito", f"Polígonos exportados a: {file_path}")
+            except Exception as e:
+                messagebox.showerror("Error", f"No se pudo exportar: {str(e)}")
+    
+    def export_progressive(self):
+        """Exporta el árbol como flujo progresivo por niveles"""
+        if self.quadtree.Raiz is None:
+            messagebox.showwarning("Advertencia", "No hay QuadTree para exportar")
+            return
+        if not self.is_binary_tree():
+            messagebox.showwarning("Advertencia", "Disponible solo en modo escala de grises")
+            return
+        
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".qtp",
+            filetypes=[("QuadTree Progresivo", "*.qtp")]
+        )
+        
+        if file_path:
+            try:
+                with open(file_path, 'wb') as f:
+                    f.writelines(self.quadtree.iter_progressive())
+                
+                messagebox.showinfo("Éxito", f"Flujo progresivo exportado a: {file_path}")
+            except Exception as e:
+                messagebox.showerror("Error", f"No se pudo exportar: {str(e)}")
+    
+    def load_progressive(self):
+        """Abre un flujo progresivo y lo muestra de lo grueso a lo fino"""
+        file_path = filedialog.askopenfilename(
+            title="Abrir flujo progresivo",
+            filetypes=[("QuadTree Progresivo", "*.qtp")]
+        )
+        
+        if file_path:
+            try:
+                with open(file_path, 'rb') as f:
+                    datos = f.read()
+                
+                # Sin imagen ni matriz: solo se muestra el árbol (binario)
+                self.source_image = None
+                self.image_path = None
+                self.original_image = None
+                self.binary_matrix = None
+                self.binary_display = None
+                self.clear_canvas(self.original_canvas)
+                self.clear_canvas(self.binary_canvas)
+                self.quadtree = QuadTree()
+                self.color_mode.set('gray')
+                
+                # Vista previa nivel por nivel hasta resolver el árbol completo
+                depth = 0
+                while True:
+                    self.quadtree.decode_progressive(datos, max_depth=depth)
+                    self.update_display()
+                    self.status_bar.config(text=f"Flujo progresivo - nivel {depth}")
+                    self.root.update()
+                    if not any(r['pending'] for r in self.quadtree.get_tree_structure()):
+                        break
+                    if self.quadtree.get_max_depth() < depth:
+                        break  # Flujo truncado: no hay más niveles
+                    depth += 1
+                
+                self.img_info.config(text=f"{self.quadtree.W}x{self.quadtree.H} px")
+                self.update_stats_display()
+                self.status_bar.config(text=f"Flujo progresivo cargado: {file_path}")
+            except Exception as e:
+                messagebox.showerror("Error", f"No se pudo abrir el flujo: {str(e)}")
+                self.status_bar.config(text="Error al abrir flujo progresivo")
+    
     def show_tree_ascii(self):
         """Muestra el árbol en formato ASCII"""
         if self.quadtree.Raiz is None:
@@ -881,9 +1092,13 @@ RENDIMIENTO:
         text.insert(tk.END, "ESTRUCTURA DEL QUADTREE\n")
         text.insert(tk.END, "═" * 80 + "\n\n")
         text.insert(tk.END, "Leyenda:\n")
-        text.insert(tk.END, "  0 = Negro (todos los píxeles son 0)\n")
-        text.insert(tk.END, "  1 = Blanco (todos los píxeles son 1)\n")
-        text.insert(tk.END, "  2 = Gris (píxeles mixtos, tiene 4 hijos)\n\n")
+        if isinstance(self.quadtree, QuadTreeEtiquetas):
+            text.insert(tk.END, "  n = Etiqueta (todos los píxeles son de la clase n)\n")
+            text.insert(tk.END, "  -1 = Mixto (varias etiquetas, tiene 4 hijos)\n\n")
+        else:
+            text.insert(tk.END, "  0 = Negro (todos los píxeles son 0)\n")
+            text.insert(tk.END, "  1 = Blanco (todos los píxeles son 1)\n")
+            text.insert(tk.END, "  2 = Gris (píxeles mixtos, tiene 4 hijos)\n\n")
         text.insert(tk.END, "Estructura: [SI, SD, ID, II]\n")
         text.insert(tk.END, "  SI = Superior Izquierdo\n")
         text.insert(tk.END, "  SD = Superior Derecho\n")
@@ -891,11 +1106,18 @@ RENDIMIENTO:
         text.insert(tk.END, "  II = Inferior Izquierdo\n\n")
         text.insert(tk.END, "=" * 80 + "\n\n")
         
-        self._print_tree_ascii(self.quadtree.Raiz, text, "", True)
+        if isinstance(self.quadtree, QuadTreeCanales):
+            # Un árbol por canal
+            for name, quadtree in zip(QuadTreeCanales.CANALES, self.quadtree.canales):
+                text.insert(tk.END, f"Canal {name}:\n")
+                self._print_tree_ascii(quadtree.Raiz, text, "", True)
+                text.insert(tk.END, "\n")
+        else:
+            self._print_tree_ascii(self.quadtree.Raiz, text, "", True, self.quadtree.GRIS)
         
         text.config(state=tk.DISABLED)
     
-    def _print_tree_ascii(self, nodo, text_widget, prefix, is_last):
+    def _print_tree_ascii(self, nodo, text_widget, prefix, is_last, gris=2):
         """Imprime el árbol en formato ASCII recursivamente"""
         if nodo is None:
             return
@@ -903,30 +1125,35 @@ RENDIMIENTO:
         # Determinar el símbolo de conexión
         connector = "└── " if is_last else "├── "
         
-        # Determinar el tipo de nodo
-        node_type = {0: "Negro", 1: "Blanco", 2: "Gris"}
+        # Determinar el tipo de nodo (en árboles de etiquetas, gris = -1)
+        if gris == 2:
+            node_type = {0: "Negro", 1: "Blanco", 2: "Gris"}
+        else:
+            node_type = {gris: "Mixto"}
+        name = node_type.get(nodo.Info, 'Etiqueta' if gris != 2 else 'Desconocido')
         
-        text_widget.insert(tk.END, prefix + connector + f"[{nodo.Info}] {node_type.get(nodo.Info, 'Desconocido')}\n")
+        text_widget.insert(tk.END, prefix + connector + f"[{nodo.Info}] {name}\n")
         
         # Si es un nodo gris (tiene hijos)
-        if nodo.Info == 2:
+        if nodo.Info == gris:
             # Preparar prefijo para los hijos
             new_prefix = prefix + ("    " if is_last else "│   ")
             
-            # Imprimir los 4 hijos
+            # Imprimir los hijos (en regiones de una fila o columna hay solo 2)
             children = [
-                ("SI", nodo.SI),
-                ("SD", nodo.SD),
-                ("ID", nodo.ID),
-                ("II", nodo.II)
+                (name, child) for name, child in (
+                    ("SI", nodo.SI),
+                    ("SD", nodo.SD),
+                    ("ID", nodo.ID),
+                    ("II", nodo.II)
+                ) if child is not None
             ]
             
             for i, (name, child) in enumerate(children):
-                if child is not None:
-                    is_last_child = (i == 3)
-                    text_widget.insert(tk.END, new_prefix + ("└── " if is_last_child else "├── ") + f"{name}:\n")
-                    child_prefix = new_prefix + ("    " if is_last_child else "│   ")
-                    self._print_tree_ascii(child, text_widget, child_prefix, True)
+                is_last_child = (i == len(children) - 1)
+                text_widget.insert(tk.END, new_prefix + ("└── " if is_last_child else "├── ") + f"{name}:\n")
+                child_prefix = new_prefix + ("    " if is_last_child else "│   ")
+                self._print_tree_ascii(child, text_widget, child_prefix, True, gris)
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -0,0 +1,216 @@
+"""Índice de similitud para colecciones de máscaras binarias (QuadTrees).
+
+Por cada máscara se guarda una firma de ocupación (fracción de píxeles negros
+de cada cuadrante de un nivel fijo, cuantizada a uint8) en una sola matriz
+NumPy, y el árbol como flujo progresivo. Una consulta hace:
+
+1. Filtro grueso vectorizado: con las firmas se calcula, para toda la
+   colección a la vez, una cota inferior de la distancia XOR en píxeles.
+2. Refinamiento: los candidatos se decodifican en orden de cota y se mide la
+   distancia exacta (QuadTree.xor_distance) hasta que ninguna cota restante
+   pueda mejorar el top-k (resultado exacto) o hasta refinar MAX_CANDIDATOS
+   árboles. Si nada de la colección se parece a la consulta las cotas no
+   descartan casi nada; con el límite el resultado puede ser aproximado, y
+   la búsqueda lo informa.
+
+    python indice.py construir carpeta/ indice.npz --method otsu
+    python indice.py buscar indice.npz consulta.png -k 5
+
+Solo se comparan máscaras del mismo tamaño que la consulta.
+"""
+import argparse
+import heapq
+import os
+import time
+
+import numpy as np
+from PIL import Image
+
+from quadtree import QuadTree, binarizar
+
+EXTENSIONES = ('.png', '.jpg', '.jpeg', '.bmp', '.gif')
+
+
+class IndiceQuadTree:
+    """Colección de QuadTrees binarios con búsqueda de los más parecidos"""
+    BLOQUE = 8192  # Filas de firmas por bloque al calcular las cotas
+    MAX_CANDIDATOS = 100  # Árboles refinados por consulta (2-4 ms cada uno en 64x64)
+
+    def __init__(self, profundidad=4):
+        lado = 1 << profundidad
+        self.profundidad = profundidad
+        self.firmas = np.zeros((0, lado * lado), dtype=np.uint8)  # Fracción negra x 255
+        self.formas = np.zeros((0, 2), dtype=np.int64)             # (H, W) de cada máscara
+        self.nombres = []
+        self.arboles = []  # Flujo progresivo de cada árbol (bytes)
+        self._nuevas = []  # (firma, forma) aún no pasadas a las matrices
+
+    def __len__(self):
+        return len(self.nombres)
+
+    @staticmethod
+    def _fracciones(negros, areas):
+        """Fracción negra de cada celda en escala 0-255 (0 en celdas vacías)"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(areas > 0, negros * 255.0 / areas, 0.0).ravel()
+
+    def agregar(self, quadtree, nombre=None):
+        """Agrega un QuadTree binario a la colección"""
+        negros, areas = quadtree.get_signature(self.profundidad)
+        firma = np.round(self._fracciones(negros, areas)).astype(np.uint8)
+        self._nuevas.append((firma, (quadtree.H, quadtree.W)))
+        self.nombres.append(str(len(self.nombres)) if nombre is None else nombre)
+        self.arboles.append(quadtree.encode_progressive())
+
+    def _consolidar(self):
+        """Pasa las firmas agregadas a las matrices (una sola copia)"""
+        if self._nuevas:
+            self.firmas = np.concatenate([self.firmas, np.stack([f for f, _ in self._nuevas])])
+            self.formas = np.concatenate([self.formas, np.array([s for _, s in self._nuevas])])
+            self._nuevas = []
+
+    def _arbol(self, i):
+        """Decodifica el árbol de la máscara i"""
+        quadtree = QuadTree()
+        quadtree.decode_progressive(self.arboles[i])
+        return quadtree
+
+    def _cotas(self, indices, consulta, pesos):
+        """Cota inferior de la distancia XOR de la consulta a cada máscara.
+
+        En cada celda, la diferencia de píxeles negros acota los píxeles
+        distintos; se descuenta medio nivel por el redondeo a uint8."""
+        cotas = np.empty(len(indices))
+        for inicio in range(0, len(indices), self.BLOQUE):
+            firmas = self.firmas[indices[inicio:inicio + self.BLOQUE]]
+            diferencia = np.abs(firmas - consulta) - 0.5
+            np.maximum(diferencia, 0, out=diferencia)
+            cotas[inicio:inicio + self.BLOQUE] = diferencia @ pesos
+        return cotas
+
+    def buscar(self, quadtree, k=5, max_candidatos=MAX_CANDIDATOS):
+        """Las k máscaras más parecidas a quadtree (menor distancia XOR).
+
+        Devuelve un diccionario con 'resultados' (lista de (nombre,
+        distancia) ordenada), 'refinados' (árboles comparados) y 'exacto'
+        (False si el límite max_candidatos cortó el refinamiento antes de
+        que las cotas garantizaran el top-k). Con max_candidatos=None no hay
+        límite y el resultado siempre es exacto."""
+        if k < 1:
+            raise ValueError("k debe ser al menos 1")
+        self._consolidar()
+        negros, areas = quadtree.get_signature(self.profundidad)
+        consulta = self._fracciones(negros, areas)
+        pesos = areas.ravel() / 255.0
+
+        indices = np.flatnonzero((self.formas == (quadtree.H, quadtree.W)).all(axis=1))
+        cotas = self._cotas(indices, consulta, pesos)
+        orden = np.argsort(cotas, kind='stable')
+
+        mejores = []  # Montículo de (-distancia, -i): en la cima, el peor de los k
+        refinados = 0
+        exacto = True
+        for pos in orden:
+            # Ninguna máscara restante puede quedar por debajo del k-ésimo
+            if len(mejores) == k and cotas[pos] >= -mejores[0][0]:
+                break
+            if max_candidatos is not None and refinados >= max_candidatos:
+                exacto = False
+                break
+            i = int(indices[pos])
+            distancia = quadtree.xor_distance(self._arbol(i))
+            refinados += 1
+            heapq.heappush(mejores, (-distancia, -i))
+            if len(mejores) > k:
+                heapq.heappop(mejores)
+
+        return {
+            'resultados': [(self.nombres[-i], -d) for d, i in sorted(mejores, reverse=True)],
+            'refinados': refinados,
+            'exacto': exacto
+        }
+
+    def guardar(self, ruta):
+        """Guarda el índice en un archivo .npz"""
+        self._consolidar()
+        offsets = np.zeros(len(self.arboles) + 1, dtype=np.int64)
+        np.cumsum([len(a) for a in self.arboles], out=offsets[1:])
+        np.savez(
+            ruta,
+            profundidad=self.profundidad,
+            firmas=self.firmas,
+            formas=self.formas,
+            nombres=np.array(self.nombres, dtype=str),
+            arboles=np.frombuffer(b''.join(self.arboles), dtype=np.uint8),
+            offsets=offsets
+        )
+
+    @classmethod
+    def cargar(cls, ruta):
+        """Carga un índice guardado con guardar"""
+        with np.load(ruta, allow_pickle=False) as datos:
+            indice = cls(int(datos['profundidad']))
+            indice.firmas = datos['firmas']
+            indice.formas = datos['formas']
+            indice.nombres = datos['nombres'].tolist()
+            arboles = datos['arboles'].tobytes()
+            offsets = datos['offsets'].tolist()
+        indice.arboles = [arboles[a:b] for a, b in zip(offsets, offsets[1:])]
+        return indice
+
+
+def quadtree_de_imagen(ruta, method, threshold):
+    """Binariza una imagen del disco y construye su QuadTree"""
+    imagen = np.array(Image.open(ruta).convert('L'))
+    binary, _ = binarizar(imagen, method, threshold)
+    quadtree = QuadTree()
+    quadtree.Construir(binary)
+    return quadtree
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Índice de similitud de máscaras QuadTree")
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    construir = comandos.add_parser('construir', help="Indexa las imágenes de una carpeta")
+    construir.add_argument('carpeta')
+    construir.add_argument('indice', help="Archivo .npz de salida")
+    construir.add_argument('--depth', type=int, default=4,
+                           help="Nivel de las firmas (grilla de 2^depth x 2^depth)")
+
+    buscar = comandos.add_parser('buscar', help="Busca las máscaras más parecidas")
+    buscar.add_argument('indice')
+    buscar.add_argument('imagen')
+    buscar.add_argument('-k', type=int, default=5)
+    buscar.add_argument('--max-candidates', type=int, default=IndiceQuadTree.MAX_CANDIDATOS,
+                        help="Máximo de árboles a refinar (0: sin límite, siempre exacto)")
+
+    for sub in (construir, buscar):
+        sub.add_argument('--method', default='threshold', choices=('threshold', 'otsu', 'mean'))
+        sub.add_argument('--threshold', type=int, default=128)
+    args = parser.parse_args()
+
+    if args.comando == 'construir':
+        inicio = time.perf_counter()
+        indice = IndiceQuadTree(args.depth)
+        for nombre in sorted(os.listdir(args.carpeta)):
+            if nombre.lower().endswith(EXTENSIONES):
+                ruta = os.path.join(args.carpeta, nombre)
+                indice.agregar(quadtree_de_imagen(ruta, args.method, args.threshold), nombre)
+        indice.guardar(args.indice)
+        print(f"{len(indice)} máscaras indexadas en {time.perf_counter() - inicio:.2f}s")
+    else:
+        indice = IndiceQuadTree.cargar(args.indice)
+        consulta = quadtree_de_imagen(args.imagen, args.method, args.threshold)
+        inicio = time.perf_counter()
+        busqueda = indice.buscar(consulta, args.k, args.max_candidates or None)
+        print(f"Búsqueda en {len(indice)} máscaras: {(time.perf_counter() - inicio) * 1000:.1f} ms, "
+              f"{busqueda['refinados']} árboles comparados")
+        if not busqueda['exacto']:
+            print("  (aproximado: se alcanzó el límite de candidatos; --max-candidates 0 da el exacto)")
+        for nombre, distancia in busqueda['resultados']:
+            print(f"  {distancia:8d} px  {nombre}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Prueba de carga para servidor.py: reporta latencias p50/p99.
+
+    python prueba_carga.py imagen.png --requests 200 --concurrency 16
+
+Con --distinct N (hasta 256) se reparten las peticiones entre N umbrales
+distintos, para medir tanto aciertos de caché como construcciones nuevas.
+Las respuestas de error del servidor se cuentan aparte; las latencias son
+las de las peticiones exitosas.
+"""
+import argparse
+import base64
+import json
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+def enviar(url, cuerpo):
+    """Hace un POST y devuelve (latencia en segundos, estado HTTP, estado de
+    caché); las respuestas de error no interrumpen la prueba"""
+    peticion = urllib.request.Request(
+        url, data=cuerpo, headers={'Content-Type': 'application/json'}
+    )
+    inicio = time.perf_counter()
+    try:
+        with urllib.request.urlopen(peticion) as respuesta:
+            respuesta.read()
+            estado = respuesta.status
+            cache = respuesta.headers.get('X-Cache', '?')
+    except urllib.error.HTTPError as error:
+        error.read()
+        estado, cache = error.code, None
+    return time.perf_counter() - inicio, estado, cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga del servidor QuadTree")
+    parser.add_argument('image', help="Imagen a enviar")
+    parser.add_argument('--url', default='http://127.0.0.1:8765/build')
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--distinct', type=int, default=1,
+                        help="Cantidad de umbrales distintos a pedir")
+    parser.add_argument('--output', default='stats', choices=('stats', 'tree', 'png'))
+    args = parser.parse_args()
+    if not 1 <= args.distinct <= 256:
+        parser.error("--distinct debe estar entre 1 y 256 (un umbral por valor 0-255)")
+
+    with open(args.image, 'rb') as f:
+        imagen = base64.b64encode(f.read()).decode('ascii')
+
+    cuerpos = [
+        json.dumps({
+            'image': imagen,
+            'method': 'threshold',
+            'threshold': (128 + i) % 256,
+            'output': args.output
+        }).encode('utf-8')
+        for i in range(args.distinct)
+    ]
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        resultados = list(pool.map(
+            lambda i: enviar(args.url, cuerpos[i % len(cuerpos)]),
+            range(args.requests)
+        ))
+    total = time.perf_counter() - inicio
+
+    exitosas = [(latencia, cache) for latencia, estado, cache in resultados if estado == 200]
+    errores = Counter(estado for _, estado, _ in resultados if estado != 200)
+
+    print(f"Peticiones:    {args.requests} (concurrencia {args.concurrency})")
+    print(f"Tiempo total:  {total:.3f}s ({args.requests / total:.1f} req/s)")
+    if exitosas:
+        latencias = np.array([latencia for latencia, _ in exitosas]) * 1000
+        caches = Counter(cache for _, cache in exitosas)
+        print(f"Latencia p50:  {np.percentile(latencias, 50):.2f} ms")
+        print(f"Latencia p99:  {np.percentile(latencias, 99):.2f} ms")
+        print(f"Latencia máx:  {latencias.max():.2f} ms")
+        print("Caché:         " + ", ".join(f"{k}={v}" for k, v in sorted(caches.items())))
+    print(f"Errores:       {sum(errores.values())}"
+          + "".join(f", {k}={v}" for k, v in sorted(errores.items())))
+
+
+if __name__ == "__main__":
+    main()
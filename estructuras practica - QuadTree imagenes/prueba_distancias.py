@@ -0,0 +1,124 @@
+"""Prueba de rendimiento de QuadTree.nearest_black y distance_transform
+contra fuerza bruta con NumPy sobre máscaras dispersas.
+
+    python prueba_distancias.py --size 1024 --blobs 20 --queries 1000
+    python prueba_distancias.py --size 2048 --band 64 --queries-only
+
+La máscara es blanca con unas pocas manchas negras (--blobs, de radio hasta
+--radius) y píxeles negros sueltos (--points). Con --band se agrega una
+franja horizontal de ruido negro de ese alto en el medio: decenas de miles
+de hojas negras, casi a la misma distancia de las celdas lejanas (el peor
+caso del índice, donde las celdas usan la búsqueda en el árbol). La fuerza bruta calcula la
+distancia a todos los píxeles negros (con sus coordenadas ya extraídas); los
+resultados se comparan entre sí. El costo de la fuerza bruta crece con la
+cantidad de píxeles negros; el del árbol, con las hojas negras candidatas de
+la celda consultada (el índice se arma en la primera consulta). Con manchas
+grandes conviene --queries-only, porque la transformada por fuerza bruta es
+O(H x W x negros).
+"""
+import argparse
+import time
+
+import numpy as np
+
+from quadtree import QuadTree
+
+
+def mascara_dispersa(rng, lado, manchas, radio_max, puntos):
+    """Fondo blanco (True) con manchas circulares y píxeles negros sueltos"""
+    mascara = np.ones((lado, lado), dtype=bool)
+    filas, columnas = np.ogrid[:lado, :lado]
+    for _ in range(manchas):
+        x0, y0 = rng.integers(0, lado, 2)
+        radio = rng.integers(2, max(3, radio_max))
+        mascara[(filas - x0) ** 2 + (columnas - y0) ** 2 <= radio ** 2] = False
+    mascara[rng.integers(0, lado, puntos), rng.integers(0, lado, puntos)] = False
+    return mascara
+
+
+def agregar_franja(rng, mascara, alto):
+    """Franja horizontal de ruido (mitad de píxeles negros) en el medio"""
+    inicio = (len(mascara) - alto) // 2
+    mascara[inicio:inicio + alto] &= rng.random((alto, mascara.shape[1])) >= 0.5
+
+
+def transformada_fuerza_bruta(mascara, negros, filas_por_tanda=16):
+    """Distancia de cada píxel a todos los píxeles negros (mínimo)"""
+    H, W = mascara.shape
+    distancias = np.empty((H, W))
+    columnas = np.arange(W)
+    for inicio in range(0, H, filas_por_tanda):
+        filas = np.arange(inicio, min(inicio + filas_por_tanda, H))
+        dx = (filas[:, None, None] - negros[:, 0]) ** 2
+        dy = (columnas[None, :, None] - negros[:, 1]) ** 2
+        distancias[filas] = np.sqrt((dx + dy).min(axis=2))
+    return distancias
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de rendimiento de distancias al negro")
+    parser.add_argument('--size', type=int, default=1024, help="Lado de la máscara")
+    parser.add_argument('--blobs', type=int, default=20)
+    parser.add_argument('--radius', type=int, default=None,
+                        help="Radio máximo de las manchas (por defecto size/64)")
+    parser.add_argument('--points', type=int, default=20)
+    parser.add_argument('--band', type=int, default=0,
+                        help="Alto de una franja de ruido negro en el medio (0: sin franja)")
+    parser.add_argument('--queries', type=int, default=1000)
+    parser.add_argument('--queries-only', action='store_true',
+                        help="No medir la transformada completa")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    radio = args.radius if args.radius is not None else args.size // 64
+    mascara = mascara_dispersa(rng, args.size, args.blobs, radio, args.points)
+    if args.band:
+        agregar_franja(rng, mascara, args.band)
+    negros = np.argwhere(~mascara)
+
+    quadtree = QuadTree()
+    quadtree.Construir(mascara)
+    print(f"Máscara:       {args.size}x{args.size}, {len(negros)} píxeles negros, "
+          f"{quadtree.count_leaves()} hojas")
+
+    # La primera consulta arma el índice de hojas negras por celda
+    inicio = time.perf_counter()
+    quadtree.nearest_black(0, 0)
+    print(f"Índice:        {(time.perf_counter() - inicio) * 1e3:.0f} ms (una vez por árbol)")
+
+    # Consultas puntuales
+    consultas = rng.integers(0, args.size, (args.queries, 2)).tolist()
+    inicio = time.perf_counter()
+    arbol = [quadtree.nearest_black(x, y)[0] for x, y in consultas]
+    tiempo_arbol = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    bruta = [
+        np.sqrt((((negros - (x, y)) ** 2).sum(axis=1)).min()) for x, y in consultas
+    ]
+    tiempo_bruta = time.perf_counter() - inicio
+    assert np.allclose(arbol, bruta)
+    print(f"Consultas:     {args.queries} -> árbol {tiempo_arbol / args.queries * 1e6:.0f} µs, "
+          f"fuerza bruta {tiempo_bruta / args.queries * 1e6:.0f} µs por consulta "
+          f"({tiempo_bruta / tiempo_arbol:.1f}x)")
+
+    if args.queries_only:
+        return
+
+    # Transformada de distancia completa
+    inicio = time.perf_counter()
+    arbol = quadtree.distance_transform()
+    tiempo_arbol = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    bruta = transformada_fuerza_bruta(mascara, negros)
+    tiempo_bruta = time.perf_counter() - inicio
+    assert np.allclose(arbol, bruta)
+    print(f"Transformada:  árbol {tiempo_arbol:.2f}s, fuerza bruta {tiempo_bruta:.2f}s "
+          f"({tiempo_bruta / tiempo_arbol:.1f}x)")
+    print("Verificación:  resultados iguales a la fuerza bruta")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Prueba de rendimiento de indice.py con máscaras sintéticas.
+
+    python prueba_indice.py --masks 100000 --size 64 --queries 20 --verify
+
+Genera máscaras con rectángulos y elipses negras, las indexa, guarda y
+carga el índice, y mide el tiempo de consultas top-k de tres tipos:
+versiones alteradas de máscaras de la colección (el mejor caso para las
+cotas), máscaras nuevas del mismo generador y ruido al azar (nada de la
+colección se parece). Con --verify compara cada resultado con la distancia
+XOR calculada por fuerza bruta sobre todas las máscaras: los exactos deben
+coincidir y los aproximados (límite de candidatos) no pueden ser mejores.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from quadtree import QuadTree
+from indice import IndiceQuadTree
+
+# Bits en 1 de cada byte, para la fuerza bruta sobre máscaras empaquetadas
+POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.int64)
+
+
+def mascara_aleatoria(rng, lado, figuras):
+    """Fondo blanco (True) con figuras negras al azar"""
+    mascara = np.ones((lado, lado), dtype=bool)
+    filas, columnas = np.ogrid[:lado, :lado]
+    for _ in range(rng.integers(1, figuras + 1)):
+        x0, y0 = rng.integers(0, lado, 2)
+        alto, ancho = rng.integers(lado // 8, lado // 2, 2)
+        if rng.random() < 0.5:
+            mascara[x0:x0 + alto, y0:y0 + ancho] = False
+        else:
+            elipse = ((filas - x0) / alto) ** 2 + ((columnas - y0) / ancho) ** 2 <= 1
+            mascara[elipse] = False
+    return mascara
+
+
+def mascara_consulta(rng, tipo, empaquetadas, lado):
+    """Máscara de consulta de un tipo: 'alterada' (una de la colección con un
+    cuadrado negro extra), 'nueva' (fuera de la colección) o 'ruido'"""
+    if tipo == 'alterada':
+        i = int(rng.integers(len(empaquetadas)))
+        mascara = np.unpackbits(empaquetadas[i], count=lado ** 2).reshape(lado, lado)
+        x0, y0 = rng.integers(0, lado - 4, 2)
+        mascara[x0:x0 + 4, y0:y0 + 4] = 0
+        return mascara.astype(bool)
+    if tipo == 'nueva':
+        return mascara_aleatoria(rng, lado, 4)
+    return rng.random((lado, lado)) < 0.5
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de rendimiento del índice de máscaras")
+    parser.add_argument('--masks', type=int, default=100000)
+    parser.add_argument('--size', type=int, default=64, help="Lado de cada máscara")
+    parser.add_argument('--depth', type=int, default=4)
+    parser.add_argument('--queries', type=int, default=20, help="Consultas de cada tipo")
+    parser.add_argument('--max-candidates', type=int, default=IndiceQuadTree.MAX_CANDIDATOS,
+                        help="Máximo de árboles a refinar por consulta (0: sin límite)")
+    parser.add_argument('-k', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--verify', action='store_true',
+                        help="Comparar con la distancia XOR por fuerza bruta")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    indice = IndiceQuadTree(args.depth)
+    empaquetadas = []  # Máscaras empaquetadas, para armar consultas y verificar
+
+    inicio = time.perf_counter()
+    for _ in range(args.masks):
+        mascara = mascara_aleatoria(rng, args.size, 4)
+        quadtree = QuadTree()
+        quadtree.Construir(mascara)
+        indice.agregar(quadtree)
+        empaquetadas.append(np.packbits(mascara))
+    print(f"Construcción:  {args.masks} máscaras en {time.perf_counter() - inicio:.1f}s")
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = os.path.join(carpeta, 'indice.npz')
+        inicio = time.perf_counter()
+        indice.guardar(ruta)
+        guardado = time.perf_counter() - inicio
+        tamaño = os.path.getsize(ruta)
+        inicio = time.perf_counter()
+        indice = IndiceQuadTree.cargar(ruta)
+        carga = time.perf_counter() - inicio
+    print(f"Archivo:       {tamaño / 2**20:.1f} MiB (guardar {guardado:.2f}s, cargar {carga:.2f}s)")
+
+    empaquetadas = np.stack(empaquetadas)
+
+    tipos = ('alterada', 'nueva', 'ruido')
+    print(f"Consultas:     {args.queries} de cada tipo (top-{args.k}, "
+          f"hasta {args.max_candidates or 'todos los'} árboles refinados)")
+    for tipo in tipos:
+        latencias = []
+        aproximadas = 0
+        for _ in range(args.queries):
+            mascara = mascara_consulta(rng, tipo, empaquetadas, args.size)
+            consulta = QuadTree()
+            consulta.Construir(mascara)
+
+            inicio = time.perf_counter()
+            busqueda = indice.buscar(consulta, args.k, args.max_candidates or None)
+            latencias.append(time.perf_counter() - inicio)
+            aproximadas += not busqueda['exacto']
+
+            if args.verify:
+                consulta = np.packbits(mascara)
+                distancias = POPCOUNT[empaquetadas ^ consulta].sum(axis=1)
+                esperadas = np.sort(distancias)[:args.k].tolist()
+                obtenidas = [d for _, d in busqueda['resultados']]
+                if busqueda['exacto']:
+                    assert obtenidas == esperadas, (obtenidas, esperadas)
+                else:
+                    assert all(o >= e for o, e in zip(obtenidas, esperadas)), (obtenidas, esperadas)
+
+        latencias = np.array(latencias) * 1000
+        print(f"  {tipo:9s} p50 {np.percentile(latencias, 50):7.1f} ms, "
+              f"máx {latencias.max():7.1f} ms, {aproximadas} aproximadas")
+    if args.verify:
+        print("Verificación:  resultados exactos iguales a la fuerza bruta")
+
+if __name__ == "__main__":
+    main()
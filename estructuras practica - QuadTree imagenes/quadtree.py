@@ -0,0 +1,1484 @@
+"""Núcleo del QuadTree de imágenes, sin interfaz gráfica.
+
+Estructuras (Nodo, MatrizBinaria, QuadTree, QuadTreeEtiquetas,
+QuadTreeCanales) y binarización. Solo depende de NumPy y Pillow, así lo
+pueden usar la interfaz (b.py), el servicio (servidor.py), el índice
+(indice.py) y las pruebas de rendimiento en un Python sin Tk.
+"""
+from PIL import Image, ImageDraw
+import numpy as np
+import time
+import json
+import struct
+import bisect
+import heapq
+
+class Nodo:
+    """Nodo del QuadTree - Adaptado del código Python"""
+    def __init__(self, info=0, SI=None, SD=None, ID=None, II=None):
+        self.Info = info  # 0=negro, 1=blanco, 2=gris (mixto)
+        self.SI = SI      # Superior Izquierdo
+        self.SD = SD      # Superior Derecho
+        self.ID = ID      # Inferior Derecho
+        self.II = II      # Inferior Izquierdo
+
+class UnionFindHojas:
+    """Estado de un etiquetado de hojas por componentes (union-find).
+    
+    Se crea en cada llamada a QuadTree._etiquetar_hojas y se pasa por la
+    recursión, así el árbol no guarda estado temporal."""
+    def __init__(self, color):
+        self.color = color  # Color de las hojas que se etiquetan
+        self.hojas = []     # (xi, yi, xf, yf) de cada hoja del color
+        self.indice = {}    # nodo -> posición en hojas
+        self.padre = []
+    
+    def agregar(self, nodo, region):
+        """Registra una hoja como componente propia"""
+        self.indice[nodo] = len(self.hojas)
+        self.hojas.append(region)
+        self.padre.append(len(self.padre))
+    
+    def buscar(self, i):
+        """Find con compresión de camino"""
+        while self.padre[i] != i:
+            self.padre[i] = self.padre[self.padre[i]]
+            i = self.padre[i]
+        return i
+    
+    def unir(self, a, b):
+        """Union entre dos hojas (nodos)"""
+        ra = self.buscar(self.indice[a])
+        rb = self.buscar(self.indice[b])
+        if ra != rb:
+            self.padre[rb] = ra
+
+class MatrizBinaria:
+    """Matriz binaria empaquetada con np.packbits: 1 bit por píxel.
+    
+    Cada fila ocupa ceil(W/8) bytes (el primer píxel en el bit más alto,
+    igual que el modo '1' de PIL). 1 = blanco, 0 = negro."""
+    def __init__(self, bits, shape):
+        # Los bits viven en un bytearray; self.bits es una vista NumPy sobre
+        # la misma memoria, así las regiones chicas se leen sin pasar por NumPy
+        self._buffer = bytearray(np.ascontiguousarray(bits, dtype=np.uint8).tobytes())
+        self.bits = np.frombuffer(self._buffer, dtype=np.uint8).reshape(bits.shape)
+        self.shape = shape  # (H, W) en píxeles
+        self._cache_mascaras = {}
+    
+    @classmethod
+    def desde(cls, matriz):
+        """Empaqueta una matriz (listas, enteros o bool); si ya es una
+        MatrizBinaria la devuelve tal cual"""
+        if isinstance(matriz, cls):
+            return matriz
+        matriz = np.asarray(matriz, dtype=bool)
+        return cls(np.packbits(matriz, axis=1), matriz.shape)
+    
+    def _mascaras(self, yi, yf):
+        """Bytes de las columnas yi..yf y la máscara de bits de cada uno
+        (None si el rango empieza y termina en borde de byte).
+        
+        Se guardan en caché: el árbol repite los mismos rangos de columnas
+        en cada fila de cuadrantes."""
+        clave = (yi, yf)
+        if clave not in self._cache_mascaras:
+            b0, b1 = yi >> 3, yf >> 3
+            mascaras = None
+            if yi & 7 or (yf + 1) & 7:
+                mascaras = np.full(b1 - b0 + 1, 0xFF, dtype=np.uint8)
+                mascaras[0] &= 0xFF >> (yi & 7)
+                mascaras[-1] &= (0xFF << (7 - (yf & 7))) & 0xFF
+            self._cache_mascaras[clave] = (b0, b1, mascaras)
+        return self._cache_mascaras[clave]
+    
+    def _mascara_entera(self, yi, yf, filas):
+        """Máscara como un solo entero de Python para leer de una vez los
+        bytes desde el inicio de la primera fila hasta el final de la
+        última (incluye los bytes intermedios de cada fila, que se anulan)"""
+        clave = (yi, yf, filas)
+        if clave not in self._cache_mascaras:
+            yi, yf = int(yi), int(yf)
+            n = (yf >> 3) - (yi >> 3) + 1
+            paso = self.bits.shape[1]
+            fila = ((1 << (n * 8 - (yi & 7))) - 1) & ~((1 << (7 - (yf & 7))) - 1)
+            mascara = 0
+            for _ in range(filas):
+                mascara = (mascara << (paso * 8)) | fila
+            self._cache_mascaras[clave] = mascara
+        return self._cache_mascaras[clave]
+    
+    def contar(self, xi, yi, xf, yf):
+        """Píxeles blancos en las filas xi..xf y columnas yi..yf
+        (popcount de la región completa como un solo entero de Python)"""
+        b0, b1, mascaras = self._mascaras(yi, yf)
+        
+        paso = self.bits.shape[1]
+        inicio = xi * paso + b0
+        fin = xf * paso + b1 + 1
+        if fin - inicio <= 2048:
+            # Región chica: un AND y un popcount sobre un solo entero
+            # (el límite acota el tamaño de las máscaras en caché)
+            mascara = self._mascara_entera(yi, yf, xf - xi + 1)
+            return (int.from_bytes(self._buffer[inicio:fin], 'big') & mascara).bit_count()
+        
+        bloque = self.bits[xi:xf+1, b0:b1+1]
+        if mascaras is not None:
+            bloque = bloque & mascaras
+        return int.from_bytes(bloque.tobytes(), 'big').bit_count()
+    
+    def total(self):
+        """Píxeles blancos en toda la matriz"""
+        return int.from_bytes(self.bits.tobytes(), 'big').bit_count()
+    
+    def pintar(self, xi, yi, xf, yf, valor):
+        """Pone la región en 0 (negro) o 1 (blanco)"""
+        b0, b1, mascaras = self._mascaras(yi, yf)
+        if mascaras is None:
+            self.bits[xi:xf+1, b0:b1+1] = 0xFF if valor else 0
+        elif valor:
+            self.bits[xi:xf+1, b0:b1+1] |= mascaras
+        else:
+            self.bits[xi:xf+1, b0:b1+1] &= ~mascaras
+    
+    def xor(self, otra):
+        """Píxeles que difieren entre dos matrices del mismo tamaño"""
+        return MatrizBinaria(self.bits ^ otra.bits, self.shape)
+    
+    def a_array(self, max_filas=None, max_columnas=None):
+        """Desempaqueta (opcionalmente solo la esquina superior izquierda)
+        como matriz uint8 de 0 y 1"""
+        H, W = self.shape
+        filas = H if max_filas is None else min(H, max_filas)
+        columnas = W if max_columnas is None else min(W, max_columnas)
+        bits = self.bits[:filas, :(columnas + 7) // 8]
+        return np.unpackbits(bits, axis=1, count=columnas)
+    
+    def a_imagen(self, xi=0, xf=None):
+        """Imagen PIL en modo '1' creada directamente desde los bits
+        (opcionalmente solo las filas xi..xf)"""
+        H, W = self.shape
+        xf = H - 1 if xf is None else xf
+        return Image.frombytes('1', (W, xf - xi + 1), self.bits[xi:xf+1].tobytes())
+    
+    def muestrear(self, filas, columnas):
+        """Imagen en modo 'L' (0 o 255) con los píxeles de las filas y
+        columnas dadas; desempaqueta solo esas filas"""
+        bits = np.unpackbits(self.bits[filas], axis=1, count=self.shape[1])
+        return Image.fromarray(bits[:, columnas] * 255, 'L')
+
+class QuadTreeBase:
+    """Parte común de los QuadTree: división en cuadrantes, recorrido,
+    renderizado y conteo de nodos.
+    
+    Las subclases construyen el árbol y definen GRIS (el Info de los nodos
+    mixtos) y el color de cada hoja; QuadTree agrega las operaciones que
+    solo tienen sentido en máscaras binarias."""
+    
+    def __init__(self):
+        self.Raiz = None
+        self.A = None  # Matriz de la imagen (su tipo depende de la subclase)
+        self.H = 0     # Filas de la matriz
+        self.W = 0     # Columnas de la matriz
+    
+    def _cuadrantes(self, xi, yi, xf, yf):
+        """Regiones de los hijos, en el orden SI, SD, ID, II.
+        
+        La división es desigual cuando el lado es impar; si la región tiene
+        una sola fila o columna se omiten los cuadrantes vacíos (ese hijo
+        queda en None)."""
+        mid_x = (xi + xf) // 2
+        mid_y = (yi + yf) // 2
+        cuadrantes = (
+            ('SI', xi, yi, mid_x, mid_y),
+            ('SD', xi, mid_y+1, mid_x, yf),
+            ('ID', mid_x+1, mid_y+1, xf, yf),
+            ('II', mid_x+1, yi, xf, mid_y)
+        )
+        return [c for c in cuadrantes if c[1] <= c[3] and c[2] <= c[4]]
+    
+    def _contar_tipos(self, nodo, signo):
+        """Suma (signo=1) o resta (signo=-1) los nodos de un subárbol en la
+        caché de conteo por tipo"""
+        if nodo is None:
+            return
+        self.conteo[nodo.Info] = self.conteo.get(nodo.Info, 0) + signo
+        if nodo.Info == self.GRIS:
+            self._contar_tipos(nodo.SI, signo)
+            self._contar_tipos(nodo.SD, signo)
+            self._contar_tipos(nodo.ID, signo)
+            self._contar_tipos(nodo.II, signo)
+    
+    def get_tree_structure(self, rect=None):
+        """Obtiene la estructura del árbol para visualización.
+        
+        Cada región usa coordenadas de imagen: 'x' es la columna inicial,
+        'y' la fila inicial, y 'width'/'height' su tamaño en píxeles. Con
+        rect = (xi, yi, xf, yf) (filas y columnas) solo se recorren los nodos
+        que intersecan ese rectángulo."""
+        structure = []
+        self._get_structure_recursive(self.Raiz, 0, 0, self.H-1, self.W-1, structure, rect)
+        return structure
+    
+    def _get_structure_recursive(self, nodo, xi, yi, xf, yf, structure, rect=None):
+        """Recursión para obtener la estructura del árbol (filas xi..xf,
+        columnas yi..yf, igual que en Cons)"""
+        if nodo is None:
+            return
+        if rect is not None and (rect[2] < xi or rect[0] > xf or rect[3] < yi or rect[1] > yf):
+            return
+        
+        structure.append({
+            'x': yi,
+            'y': xi,
+            'width': yf - yi + 1,
+            'height': xf - xi + 1,
+            'info': nodo.Info,
+            # Nodo gris sin hijos: aún no resuelto (flujo progresivo parcial)
+            'pending': nodo.Info == self.GRIS and nodo.SI is None
+        })
+        
+        if nodo.Info == self.GRIS:  # Nodo gris (tiene hijos)
+            # Procesar los cuadrantes con la misma división que Cons
+            for nombre, cxi, cyi, cxf, cyf in self._cuadrantes(xi, yi, xf, yf):
+                self._get_structure_recursive(getattr(nodo, nombre), cxi, cyi, cxf, cyf, structure, rect)
+    
+    def _region_en_pixeles(self, region, scale_x, scale_y, origen=(0, 0)):
+        """Esquinas (x0, y0, x1, y1) inclusivas de una región ya escalada,
+        relativas a origen (la esquina de un recorte)"""
+        x0 = int(region['x'] * scale_x)
+        y0 = int(region['y'] * scale_y)
+        x1 = max(int((region['x'] + region['width']) * scale_x) - 1, x0)
+        y1 = max(int((region['y'] + region['height']) * scale_y) - 1, y0)
+        return x0 - origen[0], y0 - origen[1], x1 - origen[0], y1 - origen[1]
+    
+    def caja_en_pixeles(self, xi, yi, xf, yf, width, height):
+        """Caja (x0, y0, x1, y1) de una imagen de width x height donde se
+        dibujan los nodos contenidos en las filas xi..xf y columnas yi..yf"""
+        scale_x = width / self.W
+        scale_y = height / self.H
+        # Una hoja de la última fila o columna puede empezar en int(xf * escala)
+        x1 = max(int((yf + 1) * scale_x) - 1, int(yf * scale_x))
+        y1 = max(int((xf + 1) * scale_y) - 1, int(xf * scale_y))
+        return int(yi * scale_x), int(xi * scale_y), min(x1, width - 1), min(y1, height - 1)
+    
+    def _estructura_recorte(self, width, height, box):
+        """Nodos que pueden dibujarse dentro de box = (x0, y0, x1, y1) en una
+        imagen de width x height (todos si box es None)"""
+        if box is None:
+            return self.get_tree_structure()
+        scale_x = width / self.W
+        scale_y = height / self.H
+        x0, y0, x1, y1 = box
+        # Filas y columnas de la matriz que caen en la caja, con un margen
+        # de un píxel por el redondeo de _region_en_pixeles
+        return self.get_tree_structure((
+            int(y0 / scale_y) - 1, int(x0 / scale_x) - 1,
+            int((y1 + 1) / scale_y) + 1, int((x1 + 1) / scale_x) + 1
+        ))
+    
+    def render_quadtree(self, width, height, box=None):
+        """Renderiza el QuadTree como imagen.
+        
+        Con box = (x0, y0, x1, y1) (píxeles inclusivos de la imagen de
+        width x height) se dibuja solo ese recorte, recorriendo solo los nodos
+        que lo tocan; los píxeles son los mismos que en la imagen completa."""
+        origen = (0, 0) if box is None else box[:2]
+        tamaño = (width, height) if box is None else (box[2] - box[0] + 1, box[3] - box[1] + 1)
+        img = Image.new('RGB', tamaño, color='white')
+        draw = ImageDraw.Draw(img)
+        
+        structure = self._estructura_recorte(width, height, box)
+        scale_x = width / self.W
+        scale_y = height / self.H
+        
+        for region in structure:
+            # Determinar color según el tipo de nodo
+            if region['pending']:  # Gris sin resolver: gris medio
+                color = (128, 128, 128)
+            elif region['info'] == self.GRIS:  # Gris (no se dibuja, solo sus hijos)
+                continue
+            else:
+                color = self._color_hoja(region['info'])
+            
+            draw.rectangle(self._region_en_pixeles(region, scale_x, scale_y, origen), fill=color)
+        
+        return img
+    
+    def _color_hoja(self, info):
+        """Color RGB con que se dibuja una hoja (0 negro, 1 blanco); las
+        subclases con otros valores de Info lo redefinen"""
+        return (0, 0, 0) if info == 0 else (255, 255, 255)
+    
+    def render_with_borders(self, width, height, border_color=(255, 0, 0), border_width=2, box=None):
+        """Renderiza el QuadTree con bordes (solo el recorte box, si se da)"""
+        img = self.render_quadtree(width, height, box)
+        self._dibujar_bordes(ImageDraw.Draw(img), width, height, border_color, border_width, box)
+        return img
+    
+    def _dibujar_bordes(self, draw, width, height, border_color, border_width, box=None):
+        """Dibuja el contorno de cada hoja sobre una imagen de width x height
+        (o sobre su recorte box)"""
+        structure = self._estructura_recorte(width, height, box)
+        origen = (0, 0) if box is None else box[:2]
+        scale_x = width / self.W
+        scale_y = height / self.H
+        
+        for region in structure:
+            if region['info'] != self.GRIS or region['pending']:  # Solo bordes en nodos hoja
+                draw.rectangle(
+                    self._region_en_pixeles(region, scale_x, scale_y, origen),
+                    outline=border_color,
+                    width=border_width
+                )
+    
+    def count_nodes(self, nodo=None):
+        """Cuenta el número de nodos en el árbol"""
+        if nodo is None:
+            nodo = self.Raiz
+        
+        if nodo is None:
+            return 0
+        
+        if nodo.Info != self.GRIS:  # Nodo hoja
+            return 1
+        
+        # Nodo interno, contar recursivamente
+        count = 1
+        if nodo.SI:
+            count += self.count_nodes(nodo.SI)
+        if nodo.SD:
+            count += self.count_nodes(nodo.SD)
+        if nodo.ID:
+            count += self.count_nodes(nodo.ID)
+        if nodo.II:
+            count += self.count_nodes(nodo.II)
+        
+        return count
+    
+    def count_leaves(self, nodo=None):
+        """Cuenta solo las hojas del árbol"""
+        if nodo is None:
+            nodo = self.Raiz
+        
+        if nodo is None:
+            return 0
+        
+        if nodo.Info != self.GRIS:  # Nodo hoja
+            return 1
+        
+        # Nodo interno, contar hojas recursivamente
+        count = 0
+        if nodo.SI:
+            count += self.count_leaves(nodo.SI)
+        if nodo.SD:
+            count += self.count_leaves(nodo.SD)
+        if nodo.ID:
+            count += self.count_leaves(nodo.ID)
+        if nodo.II:
+            count += self.count_leaves(nodo.II)
+        
+        return count
+    
+    def get_max_depth(self, nodo=None, depth=0):
+        """Obtiene la profundidad máxima del árbol"""
+        if nodo is None:
+            nodo = self.Raiz
+        
+        if nodo is None or nodo.Info != self.GRIS:
+            return depth
+        
+        max_d = depth
+        if nodo.SI:
+            max_d = max(max_d, self.get_max_depth(nodo.SI, depth + 1))
+        if nodo.SD:
+            max_d = max(max_d, self.get_max_depth(nodo.SD, depth + 1))
+        if nodo.ID:
+            max_d = max(max_d, self.get_max_depth(nodo.ID, depth + 1))
+        if nodo.II:
+            max_d = max(max_d, self.get_max_depth(nodo.II, depth + 1))
+        
+        return max_d
+
+class QuadTree(QuadTreeBase):
+    """QuadTree - Adaptado del código C++"""
+    GRIS = 2  # Valor de Info de los nodos mixtos (con hijos)
+    # Fila y columna de cada hijo dentro de la grilla 2x2 de su padre
+    POSICIONES = {'SI': (0, 0), 'SD': (0, 1), 'ID': (1, 1), 'II': (1, 0)}
+    LIMITE_BLOQUE = 1 << 18  # Candidatas x píxeles por bloque en distance_transform
+    LADO_CELDA = 32  # Lado aproximado de las celdas del índice de nearest_black
+    MAX_CANDIDATAS_CELDA = 256  # Hojas negras guardadas por celda como máximo
+    
+    def __init__(self):
+        super().__init__()
+        self.A = None  # Matriz de la imagen (MatrizBinaria)
+        self.conteo = {0: 0, 1: 0, self.GRIS: 0}  # Nodos por tipo (caché de estadísticas)
+        self._indice_negras = None  # Hojas negras por celda (caché de nearest_black)
+        
+    def Construir(self, matriz):
+        """Construye el QuadTree a partir de una matriz binaria de H x W
+        (no necesita ser cuadrada ni potencia de 2)"""
+        self.A = MatrizBinaria.desde(matriz)
+        self.H, self.W = self.A.shape
+        self.Raiz = None
+        self.Cons(0, 0, self.H-1, self.W-1, self.Raiz)
+        self.conteo = {0: 0, 1: 0, self.GRIS: 0}
+        self._contar_tipos(self.Raiz, 1)
+        self._indice_negras = None
+        
+    def Cons(self, xi, yi, xf, yf, R):
+        """Construcción recursiva del QuadTree sobre las filas xi..xf y las
+        columnas yi..yf"""
+        # Calcular la suma de colores en la región (popcount sobre los bytes)
+        Color = self.A.contar(xi, yi, xf, yf)
+        
+        # Determinar el tipo de nodo
+        area = (xf - xi + 1) * (yf - yi + 1)
+        
+        if Color == 0:  # Todos negros
+            nuevo_nodo = Nodo(0)
+        elif Color == area:  # Todos blancos
+            nuevo_nodo = Nodo(1)
+        else:  # Mixto (gris)
+            nuevo_nodo = Nodo(self.GRIS)
+            # Dividir recursivamente en 4 cuadrantes (SI, SD, ID, II)
+            for nombre, cxi, cyi, cxf, cyf in self._cuadrantes(xi, yi, xf, yf):
+                hijo = Nodo()
+                self.Cons(cxi, cyi, cxf, cyf, hijo)
+                setattr(nuevo_nodo, nombre, hijo)
+        
+        if R is None:
+            self.Raiz = nuevo_nodo
+        else:
+            # Copiar los valores al nodo de referencia
+            R.Info = nuevo_nodo.Info
+            R.SI = nuevo_nodo.SI
+            R.SD = nuevo_nodo.SD
+            R.ID = nuevo_nodo.ID
+            R.II = nuevo_nodo.II
+    
+    def Actualizar(self, matriz):
+        """Actualiza el QuadTree con un nuevo cuadro reconstruyendo solo los
+        cuadrantes que cambiaron respecto a la matriz anterior.
+        
+        Los subárboles sin cambios se reutilizan tal cual. Devuelve un
+        diccionario con el costo de la actualización."""
+        start_time = time.time()
+        nueva = MatrizBinaria.desde(matriz)
+        
+        if self.Raiz is None or self.A is None or nueva.shape != self.A.shape:
+            # Sin cuadro previo compatible: construcción completa
+            self.Construir(nueva)
+            return {
+                'tiempo': time.time() - start_time,
+                'pixeles_cambiados': self.H * self.W,
+                'nodos_cambiados': self.count_nodes(),
+                'reconstruccion_completa': True
+            }
+        
+        # XOR de los bits contra la matriz binaria anterior
+        cambios = self.A.xor(nueva)
+        self.A = nueva
+        self._indice_negras = None
+        self.Raiz, nodos_cambiados = self._actualizar_recursivo(
+            self.Raiz, 0, 0, self.H-1, self.W-1, cambios
+        )
+        
+        return {
+            'tiempo': time.time() - start_time,
+            'pixeles_cambiados': cambios.total(),
+            'nodos_cambiados': nodos_cambiados,
+            'reconstruccion_completa': False
+        }
+    
+    def _actualizar_recursivo(self, nodo, xi, yi, xf, yf, cambios):
+        """Recursión de Actualizar: devuelve el nodo para la región dada y
+        cuántos nodos nuevos se crearon"""
+        # Bloque sin cambios: se reutiliza el subárbol completo
+        if cambios.contar(xi, yi, xf, yf) == 0:
+            return nodo, 0
+        
+        if nodo.Info != self.GRIS:
+            # La hoja anterior ya no sirve: reconstruir solo este cuadrante
+            nuevo_nodo = Nodo()
+            self.Cons(xi, yi, xf, yf, nuevo_nodo)
+            self._contar_tipos(nodo, -1)
+            self._contar_tipos(nuevo_nodo, 1)
+            return nuevo_nodo, self.count_nodes(nuevo_nodo)
+        
+        blancos = self.A.contar(xi, yi, xf, yf)
+        if blancos == 0 or blancos == (xf - xi + 1) * (yf - yi + 1):
+            # Todos negros (0) o todos blancos (1): el subárbol colapsa en una hoja
+            nuevo_nodo = Nodo(0 if blancos == 0 else 1)
+            self._contar_tipos(nodo, -1)
+            self._contar_tipos(nuevo_nodo, 1)
+            return nuevo_nodo, 1
+        
+        # Nodo gris: se crea un nodo nuevo que comparte los hijos sin cambios
+        nuevo_nodo = Nodo(self.GRIS)
+        nodos_cambiados = 1
+        for nombre, cxi, cyi, cxf, cyf in self._cuadrantes(xi, yi, xf, yf):
+            hijo, n = self._actualizar_recursivo(
+                getattr(nodo, nombre), cxi, cyi, cxf, cyf, cambios
+            )
+            setattr(nuevo_nodo, nombre, hijo)
+            nodos_cambiados += n
+        return nuevo_nodo, nodos_cambiados
+    
+    def ConstruirSecuencia(self, cuadros):
+        """Procesa una secuencia de matrices binarias (cuadros de video o
+        cámara) y entrega, cuadro a cuadro, el reporte de Actualizar"""
+        for indice, matriz in enumerate(cuadros):
+            reporte = self.Actualizar(matriz)
+            reporte['cuadro'] = indice
+            yield reporte
+    
+    def set_pixel(self, x, y, valor):
+        """Cambia un píxel (fila x, columna y) a 0 (negro) o 1 (blanco).
+        
+        Recorre un solo camino desde la raíz: O(profundidad)."""
+        return self.set_rect(x, y, x, y, valor)
+    
+    def set_rect(self, xi, yi, xf, yf, valor):
+        """Pinta el rectángulo [xi..xf] x [yi..yf] (filas x columnas) con
+        0 (negro) o 1 (blanco), dividiendo hojas donde haga falta y
+        fusionando hermanos uniformes al volver hacia la raíz.
+        
+        Devuelve la región (xi, yi, xf, yf) que abarca los nodos que
+        cambiaron (hojas repintadas, divididas o fusionadas), para redibujar
+        solo esa zona, o None si no cambió nada."""
+        if valor not in (0, 1):
+            raise ValueError(f"El valor de un píxel debe ser 0 o 1, no {valor!r}")
+        if self.Raiz is None:
+            return None
+        
+        # Recortar a los límites de la matriz
+        xi, yi = max(xi, 0), max(yi, 0)
+        xf, yf = min(xf, self.H-1), min(yf, self.W-1)
+        if xi > xf or yi > yf:
+            return None
+        
+        self.A.pintar(xi, yi, xf, yf, valor)
+        cambiados = []
+        self._pintar(self.Raiz, 0, 0, self.H-1, self.W-1, (xi, yi, xf, yf), valor, cambiados)
+        if not cambiados:
+            return None
+        self._indice_negras = None
+        return (min(r[0] for r in cambiados), min(r[1] for r in cambiados),
+                max(r[2] for r in cambiados), max(r[3] for r in cambiados))
+    
+    def _pintar(self, nodo, xi, yi, xf, yf, rect, valor, cambiados):
+        """Recursión de set_rect sobre los nodos que intersecan el rectángulo
+        (guarda en cambiados la región de cada nodo modificado)"""
+        rxi, ryi, rxf, ryf = rect
+        
+        # Sin intersección, o la hoja ya tiene el color pedido
+        if rxf < xi or rxi > xf or ryf < yi or ryi > yf or nodo.Info == valor:
+            return
+        
+        # Región cubierta por completo: el nodo pasa a ser una hoja
+        if rxi <= xi and xf <= rxf and ryi <= yi and yf <= ryf:
+            self._contar_tipos(nodo, -1)
+            nodo.Info = valor
+            nodo.SI = nodo.SD = nodo.ID = nodo.II = None
+            self.conteo[valor] += 1
+            cambiados.append((xi, yi, xf, yf))
+            return
+        
+        cuadrantes = self._cuadrantes(xi, yi, xf, yf)
+        
+        # Dividir la hoja en hojas de su mismo color (una por cuadrante)
+        if nodo.Info != self.GRIS:
+            color = nodo.Info
+            nodo.Info = 2
+            for nombre, _, _, _, _ in cuadrantes:
+                setattr(nodo, nombre, Nodo(color))
+            self.conteo[color] += len(cuadrantes) - 1
+            self.conteo[self.GRIS] += 1
+            cambiados.append((xi, yi, xf, yf))
+        
+        for nombre, cxi, cyi, cxf, cyf in cuadrantes:
+            self._pintar(getattr(nodo, nombre), cxi, cyi, cxf, cyf, rect, valor, cambiados)
+        
+        # Fusionar si todos los hijos quedaron como hojas del mismo color
+        hijos = [getattr(nodo, nombre) for nombre, _, _, _, _ in cuadrantes]
+        color = hijos[0].Info
+        if color != self.GRIS and all(h.Info == color for h in hijos):
+            nodo.Info = color
+            nodo.SI = nodo.SD = nodo.ID = nodo.II = None
+            self.conteo[color] -= len(hijos) - 1
+            self.conteo[self.GRIS] -= 1
+            cambiados.append((xi, yi, xf, yf))
+    
+    def get_components(self, color=0):
+        """Etiqueta las regiones conexas (4-vecindad) del color dado trabajando
+        sobre las hojas del árbol, sin recorrer píxel por píxel.
+        
+        Las hojas vecinas se encuentran recorriendo los bordes compartidos
+        entre cuadrantes hermanos y se unen con union-find, así que el costo es
+        proporcional al número de hojas. Devuelve una lista con área, caja
+        envolvente y centroide de cada componente."""
+        componentes = {}
+        for raiz, (xi, yi, xf, yf) in self._etiquetar_hojas(color):
+            area = (xf - xi + 1) * (yf - yi + 1)
+            if raiz not in componentes:
+                componentes[raiz] = {'area': 0, 'bbox': [xi, yi, xf, yf],
+                                     'suma_x': 0.0, 'suma_y': 0.0}
+            c = componentes[raiz]
+            c['area'] += area
+            c['bbox'] = [min(c['bbox'][0], xi), min(c['bbox'][1], yi),
+                         max(c['bbox'][2], xf), max(c['bbox'][3], yf)]
+            c['suma_x'] += area * (xi + xf) / 2
+            c['suma_y'] += area * (yi + yf) / 2
+        
+        resultado = []
+        for etiqueta, c in enumerate(componentes.values()):
+            resultado.append({
+                'etiqueta': etiqueta,
+                'area': c['area'],
+                'bbox': tuple(c['bbox']),  # (fila_min, col_min, fila_max, col_max)
+                'centroide': (c['suma_x'] / c['area'], c['suma_y'] / c['area'])
+            })
+        
+        return resultado
+    
+    def _etiquetar_hojas(self, color):
+        """Devuelve (componente, región) para cada hoja del color dado, donde
+        componente identifica la región conexa a la que pertenece la hoja"""
+        uf = UnionFindHojas(color)
+        self._registrar_hojas(self.Raiz, 0, 0, self.H-1, self.W-1, uf)
+        self._unir_interior(self.Raiz, uf)
+        return [(uf.buscar(i), region) for i, region in enumerate(uf.hojas)]
+    
+    def _registrar_hojas(self, nodo, xi, yi, xf, yf, uf):
+        """Guarda la región de cada hoja del color que se está etiquetando"""
+        if nodo is None:
+            return
+        if nodo.Info == self.GRIS:
+            for nombre, cxi, cyi, cxf, cyf in self._cuadrantes(xi, yi, xf, yf):
+                self._registrar_hojas(getattr(nodo, nombre), cxi, cyi, cxf, cyf, uf)
+        elif nodo.Info == uf.color:
+            uf.agregar(nodo, (xi, yi, xf, yf))
+    
+    def _unir_interior(self, nodo, uf):
+        """Une las hojas vecinas dentro del subárbol de un nodo"""
+        if nodo is None or nodo.Info != self.GRIS:
+            return
+        self._unir_interior(nodo.SI, uf)
+        self._unir_interior(nodo.SD, uf)
+        self._unir_interior(nodo.ID, uf)
+        self._unir_interior(nodo.II, uf)
+        
+        # Bordes verticales entre hermanos (izquierdo | derecho)
+        self._unir_horizontal(nodo.SI, nodo.SD, uf)
+        self._unir_horizontal(nodo.II, nodo.ID, uf)
+        # Bordes horizontales entre hermanos (arriba / abajo)
+        self._unir_vertical(nodo.SI, nodo.II, uf)
+        self._unir_vertical(nodo.SD, nodo.ID, uf)
+    
+    def _unir_horizontal(self, izq, der, uf):
+        """Une las hojas que se tocan a lo largo del borde entre izq y der"""
+        if izq is None or der is None:
+            return
+        color = uf.color
+        if izq.Info != self.GRIS and der.Info != self.GRIS:
+            if izq.Info == color and der.Info == color:
+                uf.unir(izq, der)
+        elif izq.Info == self.GRIS and der.Info == self.GRIS:
+            self._unir_horizontal(self._hijo_de_borde(izq, 'SD', 'SI'), der.SI, uf)
+            self._unir_horizontal(self._hijo_de_borde(izq, 'ID', 'II'), der.II, uf)
+        elif izq.Info == self.GRIS:
+            if der.Info == color:
+                self._unir_horizontal(self._hijo_de_borde(izq, 'SD', 'SI'), der, uf)
+                self._unir_horizontal(self._hijo_de_borde(izq, 'ID', 'II'), der, uf)
+        elif izq.Info == color:
+            self._unir_horizontal(izq, der.SI, uf)
+            self._unir_horizontal(izq, der.II, uf)
+    
+    def _unir_vertical(self, arriba, abajo, uf):
+        """Une las hojas que se tocan a lo largo del borde entre arriba y abajo"""
+        if arriba is None or abajo is None:
+            return
+        color = uf.color
+        if arriba.Info != self.GRIS and abajo.Info != self.GRIS:
+            if arriba.Info == color and abajo.Info == color:
+                uf.unir(arriba, abajo)
+        elif arriba.Info == self.GRIS and abajo.Info == self.GRIS:
+            self._unir_vertical(self._hijo_de_borde(arriba, 'II', 'SI'), abajo.SI, uf)
+            self._unir_vertical(self._hijo_de_borde(arriba, 'ID', 'SD'), abajo.SD, uf)
+        elif arriba.Info == self.GRIS:
+            if abajo.Info == color:
+                self._unir_vertical(self._hijo_de_borde(arriba, 'II', 'SI'), abajo, uf)
+                self._unir_vertical(self._hijo_de_borde(arriba, 'ID', 'SD'), abajo, uf)
+        elif arriba.Info == color:
+            self._unir_vertical(arriba, abajo.SI, uf)
+            self._unir_vertical(arriba, abajo.SD, uf)
+    
+    def _hijo_de_borde(self, nodo, nombre, alternativo):
+        """Hijo que toca el borde derecho (o inferior) de un nodo gris.
+        
+        En regiones de una sola columna (o fila) ese cuadrante no existe y el
+        borde lo forma el hijo alternativo."""
+        hijo = getattr(nodo, nombre)
+        return hijo if hijo is not None else getattr(nodo, alternativo)
+    
+    def get_polygons(self, color=0):
+        """Genera, una por una, las regiones conexas del color dado como
+        polígonos rectilíneos.
+        
+        Las hojas se agrupan con el mismo etiquetado de get_components (sin
+        recorrer píxeles) y el contorno se obtiene cancelando los bordes que
+        comparten hojas vecinas. Cada polígono es una lista de anillos de
+        vértices (x=columna, y=fila): primero el exterior y luego los huecos."""
+        grupos = {}
+        for raiz, region in self._etiquetar_hojas(color):
+            grupos.setdefault(raiz, []).append(region)
+        
+        for regiones in grupos.values():
+            anillos = self._contorno(regiones)
+            anillos.sort(key=self._area_anillo, reverse=True)
+            yield anillos
+    
+    def _contorno(self, regiones):
+        """Anillos del contorno de la unión de rectángulos (filas xi..xf,
+        columnas yi..yf) que no se solapan.
+        
+        Los segmentos se orientan con el interior a la derecha (en
+        coordenadas de imagen), así el exterior tiene área positiva y los
+        huecos negativa."""
+        horizontales = {}  # y -> [(x, +1/-1)] inicio/fin de bordes
+        verticales = {}    # x -> [(y, +1/-1)]
+        for xi, yi, xf, yf in regiones:
+            x0, x1, y0, y1 = yi, yf + 1, xi, xf + 1
+            # Borde superior (+1) e inferior (-1)
+            horizontales.setdefault(y0, []).extend([(x0, 1), (x1, -1)])
+            horizontales.setdefault(y1, []).extend([(x0, -1), (x1, 1)])
+            # Borde izquierdo (+1) y derecho (-1)
+            verticales.setdefault(x0, []).extend([(y0, 1), (y1, -1)])
+            verticales.setdefault(x1, []).extend([(y0, -1), (y1, 1)])
+        
+        siguiente = {}  # punto inicial -> segmentos que salen de él
+        for y, eventos in horizontales.items():
+            for a, b, signo in self._tramos(eventos):
+                # Superior: izquierda a derecha; inferior: derecha a izquierda
+                seg = ((a, y), (b, y)) if signo > 0 else ((b, y), (a, y))
+                siguiente.setdefault(seg[0], []).append(seg)
+        for x, eventos in verticales.items():
+            for a, b, signo in self._tramos(eventos):
+                # Izquierdo: hacia arriba; derecho: hacia abajo
+                seg = ((x, b), (x, a)) if signo > 0 else ((x, a), (x, b))
+                siguiente.setdefault(seg[0], []).append(seg)
+        
+        anillos = []
+        usados = set()
+        for salida in list(siguiente.values()):
+            for inicio in salida:
+                if inicio in usados:
+                    continue
+                anillo = []
+                seg = inicio
+                while seg not in usados:
+                    usados.add(seg)
+                    anillo.append(seg[0])
+                    seg = self._siguiente_segmento(seg, siguiente[seg[1]])
+                anillos.append(self._simplificar_anillo(anillo))
+        return anillos
+    
+    def _tramos(self, eventos):
+        """Tramos (a, b, signo) de una línea donde los bordes no se cancelan"""
+        eventos.sort()
+        tramos = []
+        cobertura = 0
+        inicio = None
+        i = 0
+        while i < len(eventos):
+            pos = eventos[i][0]
+            nueva = cobertura
+            while i < len(eventos) and eventos[i][0] == pos:
+                nueva += eventos[i][1]
+                i += 1
+            if nueva != cobertura:
+                if cobertura != 0:
+                    tramos.append((inicio, pos, cobertura))
+                inicio = pos
+                cobertura = nueva
+        return tramos
+    
+    def _siguiente_segmento(self, seg, opciones):
+        """Elige cómo seguir el contorno en un vértice.
+        
+        Donde dos hojas se tocan solo por una esquina hay dos salidas; se gira
+        a la derecha para no unir esas hojas (4-vecindad)."""
+        if len(opciones) == 1:
+            return opciones[0]
+        (ax, ay), (bx, by) = seg
+        dx, dy = bx - ax, by - ay
+        for opcion in opciones:
+            (cx, cy), (ex, ey) = opcion
+            # Producto cruz > 0: giro a la derecha en coordenadas de imagen
+            if dx * (ey - cy) - dy * (ex - cx) > 0:
+                return opcion
+        return opciones[0]
+    
+    def _simplificar_anillo(self, anillo):
+        """Quita los vértices intermedios de lados colineales"""
+        puntos = []
+        n = len(anillo)
+        for i in range(n):
+            (ax, ay), (bx, by), (cx, cy) = anillo[i-1], anillo[i], anillo[(i+1) % n]
+            if (bx - ax) * (cy - by) - (by - ay) * (cx - bx) != 0:
+                puntos.append(anillo[i])
+        return puntos
+    
+    def _area_anillo(self, anillo):
+        """Área con signo de un anillo (fórmula del zapato)"""
+        return sum(
+            x0 * y1 - x1 * y0
+            for (x0, y0), (x1, y1) in zip(anillo, anillo[1:] + anillo[:1])
+        ) / 2
+    
+    def iter_svg(self, color=0):
+        """Genera el documento SVG por partes (un <path> por región), para
+        escribirlo sin armarlo completo en memoria"""
+        relleno = 'black' if color == 0 else 'white'
+        fondo = 'white' if color == 0 else 'black'
+        yield ('<svg xmlns="http://www.w3.org/2000/svg" '
+               f'width="{self.W}" height="{self.H}" viewBox="0 0 {self.W} {self.H}" '
+               'shape-rendering="crispEdges">\n')
+        yield f'<rect width="{self.W}" height="{self.H}" fill="{fondo}"/>\n'
+        yield f'<g fill="{relleno}" fill-rule="evenodd">\n'
+        for anillos in self.get_polygons(color):
+            yield f'<path d="{self._trazo_svg(anillos)}"/>\n'
+        yield '</g>\n</svg>\n'
+    
+    def _trazo_svg(self, anillos):
+        """Datos de un <path> con comandos relativos: los lados son
+        horizontales o verticales, así cada vértice es un h o un v corto.
+        Cada anillo empieza con un m relativo al inicio del anterior (donde
+        queda el punto actual después de Z)."""
+        partes = []
+        anterior = None
+        for anillo in anillos:
+            x, y = anillo[0]
+            if anterior is None:
+                partes.append(f'M{x} {y}')
+            else:
+                partes.append(f'm{x - anterior[0]} {y - anterior[1]}')
+            anterior = anillo[0]
+            # El último lado (de vuelta al inicio) lo cierra Z
+            for nx, ny in anillo[1:]:
+                partes.append(f'h{nx - x}' if ny == y else f'v{ny - y}')
+                x, y = nx, ny
+            partes.append('z')
+        return ''.join(partes)
+    
+    def iter_geojson(self, color=0):
+        """Genera una FeatureCollection GeoJSON por partes (un Polygon por
+        región, en coordenadas de imagen x=columna, y=fila)"""
+        yield '{"type": "FeatureCollection", "features": [\n'
+        primero = True
+        for anillos in self.get_polygons(color):
+            feature = {
+                'type': 'Feature',
+                'properties': {'color': color},
+                'geometry': {
+                    'type': 'Polygon',
+                    'coordinates': [
+                        [list(p) for p in anillo + anillo[:1]] for anillo in anillos
+                    ]
+                }
+            }
+            yield ('' if primero else ',\n') + json.dumps(feature, separators=(',', ':'))
+            primero = False
+        yield '\n]}\n'
+    
+    def iter_progressive(self, max_depth=None):
+        """Codifica el árbol por niveles (recorrido en anchura) y lo entrega
+        nivel por nivel.
+        
+        Formato: 'QTP1', alto y ancho (uint32) y luego un código de 2 bits por
+        nodo (0 negro, 1 blanco, 2 gris), 4 por byte, con cada nivel alineado
+        a byte. Los hijos de cada gris van en orden SI, SD, ID, II omitiendo
+        los cuadrantes vacíos, así que cualquier prefijo se puede decodificar."""
+        yield b'QTP1' + struct.pack('<II', self.H, self.W)
+        
+        nivel = [self.Raiz] if self.Raiz is not None else []
+        depth = 0
+        while nivel and (max_depth is None or depth <= max_depth):
+            codigos = np.zeros(-(-len(nivel) // 4) * 4, dtype=np.uint8)
+            codigos[:len(nivel)] = [nodo.Info for nodo in nivel]
+            yield (codigos[0::4] << 6 | codigos[1::4] << 4 |
+                   codigos[2::4] << 2 | codigos[3::4]).tobytes()
+            
+            nivel = [
+                hijo for nodo in nivel if nodo.Info == self.GRIS
+                for hijo in (nodo.SI, nodo.SD, nodo.ID, nodo.II) if hijo is not None
+            ]
+            depth += 1
+    
+    def encode_progressive(self, max_depth=None, max_bytes=None):
+        """Flujo progresivo completo, truncado opcionalmente a una
+        profundidad o a un presupuesto de bytes (mínimo la cabecera)"""
+        datos = b''.join(self.iter_progressive(max_depth))
+        if max_bytes is not None:
+            datos = datos[:max(max_bytes, 12)]
+        return datos
+    
+    def decode_progressive(self, datos, max_depth=None):
+        """Reconstruye el árbol a partir de un prefijo del flujo progresivo.
+        
+        Los nodos que el prefijo todavía no resuelve quedan como grises sin
+        hijos y se dibujan en gris medio. El árbol decodificado no tiene
+        matriz asociada (self.A es None)."""
+        if len(datos) < 12 or datos[:4] != b'QTP1':
+            raise ValueError("El flujo no es un QuadTree progresivo válido")
+        
+        self.H, self.W = struct.unpack('<II', datos[4:12])
+        self.A = None
+        self._indice_negras = None
+        
+        empaquetados = np.frombuffer(datos, dtype=np.uint8, offset=12)
+        codigos = np.stack([
+            empaquetados >> 6, (empaquetados >> 4) & 3,
+            (empaquetados >> 2) & 3, empaquetados & 3
+        ], axis=1).ravel()
+        
+        self.Raiz = Nodo(self.GRIS)
+        nivel = [(self.Raiz, 0, 0, self.H-1, self.W-1)]
+        pos = 0
+        depth = 0
+        while nivel and pos < len(codigos):
+            leidos = codigos[pos:pos + len(nivel)]
+            if (leidos > 2).any():
+                raise ValueError("Código de nodo inválido en el flujo progresivo")
+            for (nodo, _, _, _, _), codigo in zip(nivel, leidos):
+                nodo.Info = int(codigo)
+            # Cada nivel empieza en un byte nuevo
+            pos += -(-len(nivel) // 4) * 4
+            
+            # Sin más datos (o en la profundidad pedida) los grises quedan sin resolver
+            if pos >= len(codigos) or depth == max_depth:
+                break
+            
+            siguiente = []
+            for nodo, xi, yi, xf, yf in nivel:
+                if nodo.Info == self.GRIS:
+                    for nombre, cxi, cyi, cxf, cyf in self._cuadrantes(xi, yi, xf, yf):
+                        hijo = Nodo(self.GRIS)
+                        setattr(nodo, nombre, hijo)
+                        siguiente.append((hijo, cxi, cyi, cxf, cyf))
+            nivel = siguiente
+            depth += 1
+        
+        self.conteo = {0: 0, 1: 0, self.GRIS: 0}
+        self._contar_tipos(self.Raiz, 1)
+    
+    def xor_distance(self, otro):
+        """Píxeles distintos entre dos árboles del mismo tamaño (XOR exacto).
+        
+        Recorre ambos árboles a la vez: dos hojas se comparan de una vez y,
+        si solo un lado es uniforme, basta contar en el otro los píxeles del
+        color contrario, sin bajar por las regiones iguales."""
+        if (self.H, self.W) != (otro.H, otro.W):
+            raise ValueError("Los árboles deben tener el mismo tamaño")
+        return self._distancia(self.Raiz, otro.Raiz, 0, 0, self.H-1, self.W-1)
+    
+    def _distancia(self, a, b, xi, yi, xf, yf):
+        """Recursión de xor_distance sobre la región xi..xf, yi..yf"""
+        area = (xf - xi + 1) * (yf - yi + 1)
+        if a.Info != self.GRIS and b.Info != self.GRIS:
+            return 0 if a.Info == b.Info else area
+        if a.Info != self.GRIS:
+            negros = self._area_negra(b, xi, yi, xf, yf)
+            return negros if a.Info == 1 else area - negros
+        if b.Info != self.GRIS:
+            negros = self._area_negra(a, xi, yi, xf, yf)
+            return negros if b.Info == 1 else area - negros
+        
+        return sum(
+            self._distancia(getattr(a, nombre), getattr(b, nombre), cxi, cyi, cxf, cyf)
+            for nombre, cxi, cyi, cxf, cyf in self._cuadrantes(xi, yi, xf, yf)
+        )
+    
+    def _area_negra(self, nodo, xi, yi, xf, yf):
+        """Píxeles negros del subárbol (suma del área de sus hojas negras)"""
+        if nodo.Info != self.GRIS:
+            return (xf - xi + 1) * (yf - yi + 1) if nodo.Info == 0 else 0
+        return sum(
+            self._area_negra(getattr(nodo, nombre), cxi, cyi, cxf, cyf)
+            for nombre, cxi, cyi, cxf, cyf in self._cuadrantes(xi, yi, xf, yf)
+        )
+    
+    def get_signature(self, depth=4):
+        """Firma de ocupación: píxeles negros de cada cuadrante del nivel
+        depth, en una grilla de 2^depth x 2^depth.
+        
+        Devuelve (negros, areas). Las hojas de niveles superiores se reparten
+        entre sus cuadrantes; las celdas que no existen (menos de 2^depth
+        filas o columnas) quedan con área 0. Para máscaras del mismo tamaño las
+        celdas son las mismas regiones, así que sum(|negros_a - negros_b|)
+        es una cota inferior de xor_distance."""
+        lado = 1 << depth
+        negros = np.zeros((lado, lado), dtype=np.int64)
+        areas = np.zeros((lado, lado), dtype=np.int64)
+        self._firma(self.Raiz, 0, 0, self.H-1, self.W-1, depth, 0, 0, negros, areas)
+        return negros, areas
+    
+    def _firma(self, nodo, xi, yi, xf, yf, depth, i, j, negros, areas):
+        """Recursión de get_signature: (i, j) es la celda de la región en la
+        grilla de su nivel"""
+        if depth == 0:
+            areas[i, j] = (xf - xi + 1) * (yf - yi + 1)
+            negros[i, j] = self._area_negra(nodo, xi, yi, xf, yf)
+            return
+        
+        for nombre, cxi, cyi, cxf, cyf in self._cuadrantes(xi, yi, xf, yf):
+            di, dj = self.POSICIONES[nombre]
+            hijo = getattr(nodo, nombre) if nodo.Info == self.GRIS else nodo
+            self._firma(hijo, cxi, cyi, cxf, cyf, depth - 1, 2*i + di, 2*j + dj, negros, areas)
+    
+    def nearest_black(self, x, y):
+        """Píxel negro más cercano al píxel (fila x, columna y), con
+        distancia euclídea.
+        
+        La primera consulta arma un índice que se conserva hasta que el árbol
+        cambia: la imagen se divide en celdas de unos LADO_CELDA píxeles y
+        cada una guarda, como arreglos de NumPy, las hojas negras que pueden
+        tener el negro más cercano de alguno de sus píxeles (la misma poda
+        que distance_transform). Cada consulta calcula de una vez la
+        distancia a las candidatas de su celda. Las celdas con más de
+        MAX_CANDIDATAS_CELDA candidatas y los píxeles fuera de la imagen
+        usan la búsqueda en el árbol (_nearest_black_arbol).
+        Devuelve (distancia, fila, columna), o None si no hay píxeles negros."""
+        if self.Raiz is None:
+            return None
+        if not (0 <= x < self.H and 0 <= y < self.W):
+            return self._nearest_black_arbol(x, y)
+        if self._indice_negras is None:
+            self._indice_negras = self._construir_indice_negras()
+        filas, columnas, celdas = self._indice_negras
+        negras = celdas[bisect.bisect_right(filas, x) - 1][bisect.bisect_right(columnas, y) - 1]
+        if negras is None:
+            return self._nearest_black_arbol(x, y)
+        
+        nxi, nyi, nxf, nyf = negras
+        dx = np.maximum(np.maximum(nxi - x, x - nxf), 0)
+        dy = np.maximum(np.maximum(nyi - y, y - nyf), 0)
+        d2 = dx * dx + dy * dy
+        i = d2.argmin()
+        # El punto de la hoja más cercano al píxel de consulta
+        return (float(d2[i]) ** 0.5,
+                min(max(x, int(nxi[i])), int(nxf[i])), min(max(y, int(nyi[i])), int(nyf[i])))
+    
+    def _nearest_black_arbol(self, x, y):
+        """nearest_black sin índice: búsqueda best-first (ramificación y
+        poda). Los nodos salen de la cola en orden de distancia mínima a su
+        región y los cuadrantes blancos no se visitan, así que la primera
+        hoja negra que sale es la más cercana."""
+        # (distancia², desempate, nodo, región): los nodos no se comparan;
+        # el píxel de consulta puede estar fuera de la imagen
+        dx = max(-x, 0, x - (self.H-1))
+        dy = max(-y, 0, y - (self.W-1))
+        cola = [(dx*dx + dy*dy, 0, self.Raiz, (0, 0, self.H-1, self.W-1))]
+        desempate = 0
+        while cola:
+            d2, _, nodo, (xi, yi, xf, yf) = heapq.heappop(cola)
+            if nodo.Info == 0:
+                # El punto de la hoja más cercano al píxel de consulta
+                return d2 ** 0.5, min(max(x, xi), xf), min(max(y, yi), yf)
+            if nodo.Info != self.GRIS:
+                continue
+            for nombre, cxi, cyi, cxf, cyf in self._cuadrantes(xi, yi, xf, yf):
+                hijo = getattr(nodo, nombre)
+                if hijo is not None and hijo.Info != 1:
+                    desempate += 1
+                    dx = max(cxi - x, 0, x - cxf)
+                    dy = max(cyi - y, 0, y - cyf)
+                    heapq.heappush(cola, (dx*dx + dy*dy, desempate, hijo, (cxi, cyi, cxf, cyf)))
+        return None
+    
+    def _construir_indice_negras(self):
+        """Índice de nearest_black: (filas, columnas, celdas).
+        
+        filas y columnas son los inicios de las celdas (las regiones de
+        _cuadrantes a la profundidad en que miden LADO_CELDA o menos) y
+        celdas[i][j] las candidatas de la celda como arreglos xi, yi, xf, yf,
+        o None si son demasiadas."""
+        negras, blancas = [], []
+        self._hojas_por_color(self.Raiz, 0, 0, self.H-1, self.W-1, negras, blancas)
+        negras = tuple(np.array(negras, dtype=np.int64).reshape(-1, 4).T) if negras else None
+        
+        niveles, lado = 0, max(self.H, self.W)
+        while lado > self.LADO_CELDA:
+            lado = (lado + 1) // 2
+            niveles += 1
+        
+        por_region = {}
+        self._celdas_negras(0, 0, self.H-1, self.W-1, negras, niveles, por_region)
+        # Las celdas forman una grilla: las de una fila comparten la división
+        filas = sorted({xi for xi, _ in por_region})
+        columnas = sorted({yi for _, yi in por_region})
+        celdas = [[por_region[(xi, yi)] for yi in columnas] for xi in filas]
+        return filas, columnas, celdas
+    
+    def _celdas_negras(self, xi, yi, xf, yf, negras, niveles, por_region):
+        """Recursión de _construir_indice_negras: filtra las candidatas en
+        cada cuadrante hasta llegar a las celdas.
+        
+        Una región con más de MAX_CANDIDATAS_CELDA candidatas por cada celda
+        que contiene deja de filtrarse (todas sus celdas quedan en None): así
+        el trabajo por nivel y la memoria del índice quedan acotados por
+        MAX_CANDIDATAS_CELDA x celdas."""
+        if negras is not None:
+            negras = self._candidatas(xi, yi, xf, yf, negras)
+            if len(negras[0]) > self.MAX_CANDIDATAS_CELDA << (2 * niveles):
+                negras = None
+        if niveles == 0:
+            if negras is not None and len(negras[0]) > self.MAX_CANDIDATAS_CELDA:
+                negras = None
+            por_region[(xi, yi)] = negras
+            return
+        for _, cxi, cyi, cxf, cyf in self._cuadrantes(xi, yi, xf, yf):
+            self._celdas_negras(cxi, cyi, cxf, cyf, negras, niveles - 1, por_region)
+    
+    def distance_transform(self):
+        """Distancia euclídea de cada píxel al píxel negro más cercano
+        (matriz H x W; inf en todos si no hay negros).
+        
+        Trabaja por hojas: las negras valen 0 de una vez y cada hoja blanca
+        se calcula como bloque con operaciones vectorizadas, solo contra las
+        hojas negras que pueden tener el negro más cercano de alguno de sus
+        píxeles. Esas candidatas se filtran al bajar por el árbol, así cada
+        nodo parte de las de su padre."""
+        distancias = np.zeros((self.H, self.W))
+        negras, blancas = [], []
+        self._hojas_por_color(self.Raiz, 0, 0, self.H-1, self.W-1, negras, blancas)
+        if not negras:
+            distancias[:] = np.inf
+            return distancias
+        
+        negras = tuple(np.array(negras, dtype=np.int64).T)
+        self._transformar_nodo(self.Raiz, 0, 0, self.H-1, self.W-1, negras, distancias)
+        return distancias
+    
+    def _transformar_nodo(self, nodo, xi, yi, xf, yf, negras, distancias):
+        """Recursión de distance_transform (las hojas negras ya valen 0)"""
+        if nodo.Info == 1:
+            self._transformar_bloque(xi, yi, xf, yf, negras, distancias)
+        elif nodo.Info == self.GRIS:
+            negras = self._candidatas(xi, yi, xf, yf, negras)
+            for nombre, cxi, cyi, cxf, cyf in self._cuadrantes(xi, yi, xf, yf):
+                self._transformar_nodo(getattr(nodo, nombre), cxi, cyi, cxf, cyf, negras, distancias)
+    
+    def _candidatas(self, xi, yi, xf, yf, negras):
+        """Hojas negras (arreglos xi, yi, xf, yf de sus regiones) que pueden
+        tener el negro más cercano de algún píxel de la región.
+        
+        La cota es la distancia desde el píxel de la región más alejado de
+        cada hoja (basta la menor); se descartan las hojas más lejanas."""
+        nxi, nyi, nxf, nyf = negras
+        lejos_x = np.maximum(np.maximum(nxi - xi, xf - nxf), 0)
+        lejos_y = np.maximum(np.maximum(nyi - yi, yf - nyf), 0)
+        cota = (lejos_x * lejos_x + lejos_y * lejos_y).min()
+        
+        cerca_x = np.maximum(np.maximum(nxi - xf, xi - nxf), 0)
+        cerca_y = np.maximum(np.maximum(nyi - yf, yi - nyf), 0)
+        quedan = cerca_x * cerca_x + cerca_y * cerca_y <= cota
+        return tuple(a[quedan] for a in negras)
+    
+    def _transformar_bloque(self, xi, yi, xf, yf, negras, distancias):
+        """Distancias de un bloque blanco, de una vez contra sus candidatas;
+        si el trabajo (candidatas x píxeles) es grande, el bloque se divide
+        en cuadrantes, cada uno con una cota más ajustada"""
+        nxi, nyi, nxf, nyf = negras = self._candidatas(xi, yi, xf, yf, negras)
+        
+        area = (xf - xi + 1) * (yf - yi + 1)
+        if len(nxi) * area > self.LIMITE_BLOQUE and area > 256:
+            for _, cxi, cyi, cxf, cyf in self._cuadrantes(xi, yi, xf, yf):
+                self._transformar_bloque(cxi, cyi, cxf, cyf, negras, distancias)
+            return
+        
+        filas = np.arange(xi, xf + 1)
+        columnas = np.arange(yi, yf + 1)
+        dx = np.maximum(np.maximum(nxi[:, None] - filas, filas - nxf[:, None]), 0)
+        dy = np.maximum(np.maximum(nyi[:, None] - columnas, columnas - nyf[:, None]), 0)
+        d2 = (dx * dx)[:, :, None] + (dy * dy)[:, None, :]
+        distancias[xi:xf+1, yi:yf+1] = np.sqrt(d2.min(axis=0))
+    
+    def _hojas_por_color(self, nodo, xi, yi, xf, yf, negras, blancas):
+        """Separa las regiones de las hojas negras y blancas"""
+        if nodo is None:
+            return
+        if nodo.Info == self.GRIS:
+            for nombre, cxi, cyi, cxf, cyf in self._cuadrantes(xi, yi, xf, yf):
+                self._hojas_por_color(getattr(nodo, nombre), cxi, cyi, cxf, cyf, negras, blancas)
+        else:
+            (negras if nodo.Info == 0 else blancas).append((xi, yi, xf, yf))
+    
+    def get_stats(self):
+        """Estadísticas del árbol (las mismas que se exportan a JSON)"""
+        return {
+            'total_nodes': self.conteo[0] + self.conteo[1] + self.conteo[self.GRIS],
+            'leaf_nodes': self.conteo[0] + self.conteo[1],
+            'max_depth': self.get_max_depth(),
+            'black_nodes': self.conteo[0],
+            'white_nodes': self.conteo[1],
+            'gray_nodes': self.conteo[self.GRIS]
+        }
+
+class QuadTreeEtiquetas(QuadTreeBase):
+    """QuadTree de etiquetas (mapas de segmentación o imágenes con paleta).
+    
+    Cada hoja guarda el ID de clase de su región y un nodo es uniforme cuando
+    todos sus píxeles comparten la etiqueta. Como 0, 1, 2... son etiquetas
+    válidas, los nodos mixtos usan Info = -1. Solo hereda la parte común de
+    QuadTreeBase: la edición, las componentes, las distancias y las
+    exportaciones vectoriales/progresivas son de QuadTree (máscaras binarias)."""
+    GRIS = -1
+    
+    def __init__(self):
+        super().__init__()
+        self.A = None        # Matriz de etiquetas (H x W, enteros >= 0)
+        self.paleta = None   # Color RGB de cada etiqueta (K x 3, uint8)
+        self.conteo = {self.GRIS: 0}
+    
+    def Construir(self, etiquetas, paleta=None):
+        """Construye el árbol desde una matriz H x W de etiquetas enteras.
+        
+        Sin paleta se usa una de colores distinguibles (paleta_etiquetas)."""
+        etiquetas = np.ascontiguousarray(etiquetas)
+        if etiquetas.ndim != 2 or etiquetas.dtype.kind not in 'biu':
+            raise ValueError("Las etiquetas deben ser una matriz 2D de enteros")
+        if etiquetas.size == 0 or etiquetas.min() < 0:
+            raise ValueError("Las etiquetas deben ser enteros no negativos")
+        
+        n = int(etiquetas.max()) + 1
+        paleta = paleta_etiquetas(n) if paleta is None else np.asarray(paleta, dtype=np.uint8).reshape(-1, 3)
+        if len(paleta) < n:
+            raise ValueError(f"La paleta tiene {len(paleta)} colores y hay etiquetas hasta {n - 1}")
+        
+        self.A = etiquetas
+        self.paleta = paleta
+        self.H, self.W = self.A.shape
+        self.Raiz = None
+        self.Cons(0, 0, self.H-1, self.W-1, self.Raiz)
+        self.conteo = {self.GRIS: 0}
+        self._contar_tipos(self.Raiz, 1)
+    
+    def Cons(self, xi, yi, xf, yf, R):
+        """Construcción recursiva sobre las filas xi..xf y las columnas yi..yf.
+        
+        El bloque es uniforme si todos sus píxeles son iguales al primero
+        (una sola comparación vectorizada de NumPy)."""
+        bloque = self.A[xi:xf+1, yi:yf+1]
+        etiqueta = bloque[0, 0]
+        
+        if (bloque == etiqueta).all():  # Una sola etiqueta: hoja
+            nuevo_nodo = Nodo(int(etiqueta))
+        else:  # Mixto: dividir en los 4 cuadrantes (SI, SD, ID, II)
+            nuevo_nodo = Nodo(self.GRIS)
+            for nombre, cxi, cyi, cxf, cyf in self._cuadrantes(xi, yi, xf, yf):
+                hijo = Nodo()
+                self.Cons(cxi, cyi, cxf, cyf, hijo)
+                setattr(nuevo_nodo, nombre, hijo)
+        
+        if R is None:
+            self.Raiz = nuevo_nodo
+        else:
+            # Copiar los valores al nodo de referencia
+            R.Info = nuevo_nodo.Info
+            R.SI = nuevo_nodo.SI
+            R.SD = nuevo_nodo.SD
+            R.ID = nuevo_nodo.ID
+            R.II = nuevo_nodo.II
+    
+    def _color_hoja(self, info):
+        """Color de la etiqueta en la paleta"""
+        return tuple(int(c) for c in self.paleta[info])
+    
+    def get_label(self, x, y):
+        """Etiqueta del píxel (fila x, columna y) bajando desde la raíz"""
+        nodo, xi, yi, xf, yf = self.Raiz, 0, 0, self.H-1, self.W-1
+        while nodo.Info == self.GRIS:
+            for nombre, cxi, cyi, cxf, cyf in self._cuadrantes(xi, yi, xf, yf):
+                if cxi <= x <= cxf and cyi <= y <= cyf:
+                    nodo, xi, yi, xf, yf = getattr(nodo, nombre), cxi, cyi, cxf, cyf
+                    break
+        return nodo.Info
+    
+    def a_matriz(self):
+        """Reconstruye la matriz de etiquetas desde las hojas (sin pérdida)"""
+        matriz = np.empty((self.H, self.W), dtype=self.A.dtype)
+        for region in self.get_tree_structure():
+            if region['info'] != self.GRIS:
+                matriz[region['y']:region['y'] + region['height'],
+                       region['x']:region['x'] + region['width']] = region['info']
+        return matriz
+    
+    def a_imagen(self):
+        """Mapa de etiquetas coloreado con la paleta (imagen RGB)"""
+        return Image.fromarray(self.paleta[self.A], 'RGB')
+    
+    def get_stats(self):
+        """Estadísticas del árbol, con las hojas de cada etiqueta"""
+        hojas = {e: n for e, n in sorted(self.conteo.items()) if e != self.GRIS and n}
+        return {
+            'total_nodes': sum(self.conteo.values()),
+            'leaf_nodes': sum(hojas.values()),
+            'max_depth': self.get_max_depth(),
+            'gray_nodes': self.conteo[self.GRIS],
+            'labels': len(hojas),
+            'leaves_per_label': {str(e): n for e, n in hojas.items()}
+        }
+
+class QuadTreeCanales:
+    """Imagen en color como un QuadTree binario por canal (R, G, B).
+    
+    Cada canal se binariza y se construye por separado; al renderizar se
+    combinan los tres, así cada hoja aporta el color de su canal."""
+    CANALES = ('R', 'G', 'B')
+    
+    def __init__(self):
+        self.canales = [QuadTree() for _ in self.CANALES]
+    
+    @property
+    def Raiz(self):
+        return self.canales[0].Raiz
+    
+    @property
+    def H(self):
+        return self.canales[0].H
+    
+    @property
+    def W(self):
+        return self.canales[0].W
+    
+    def Construir(self, matrices):
+        """Construye un árbol por canal a partir de tres matrices binarias
+        del mismo tamaño"""
+        if len(matrices) != len(self.canales):
+            raise ValueError(f"Se esperaban {len(self.canales)} matrices, una por canal")
+        for quadtree, matriz in zip(self.canales, matrices):
+            quadtree.Construir(matriz)
+    
+    def render_quadtree(self, width, height):
+        """Renderiza los tres canales combinados en una imagen RGB"""
+        return Image.merge('RGB', [
+            quadtree.render_quadtree(width, height).convert('L') for quadtree in self.canales
+        ])
+    
+    def render_with_borders(self, width, height, border_color=(255, 0, 0), border_width=2):
+        """Renderiza los canales combinados con los bordes de las hojas de
+        los tres árboles"""
+        img = self.render_quadtree(width, height)
+        draw = ImageDraw.Draw(img)
+        for quadtree in self.canales:
+            quadtree._dibujar_bordes(draw, width, height, border_color, border_width)
+        return img
+    
+    def count_nodes(self):
+        """Nodos de los tres árboles"""
+        return sum(quadtree.count_nodes() for quadtree in self.canales)
+    
+    def count_leaves(self):
+        """Hojas de los tres árboles"""
+        return sum(quadtree.count_leaves() for quadtree in self.canales)
+    
+    def get_max_depth(self):
+        """Profundidad del árbol más profundo"""
+        return max(quadtree.get_max_depth() for quadtree in self.canales)
+    
+    def get_stats(self):
+        """Estadísticas totales y de cada canal"""
+        canales = {
+            nombre: quadtree.get_stats() for nombre, quadtree in zip(self.CANALES, self.canales)
+        }
+        return {
+            'total_nodes': sum(c['total_nodes'] for c in canales.values()),
+            'leaf_nodes': sum(c['leaf_nodes'] for c in canales.values()),
+            'max_depth': max(c['max_depth'] for c in canales.values()),
+            'channels': canales
+        }
+
+def otsu_threshold(image):
+    """Calcula el umbral óptimo usando el método de Otsu"""
+    histogram, bin_edges = np.histogram(image, bins=256, range=(0, 256))
+    histogram = histogram.astype(float)
+    
+    # Normalizar histograma
+    histogram /= histogram.sum()
+    
+    # Calcular umbrales
+    bins = np.arange(256)
+    
+    # Pesos acumulados
+    weight_bg = np.cumsum(histogram)
+    weight_fg = 1 - weight_bg
+    
+    # Medias acumuladas
+    mean_bg = np.cumsum(histogram * bins)
+    
+    # Evitar división por cero
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_bg = mean_bg / weight_bg
+        mean_fg = (np.sum(histogram * bins) - np.cumsum(histogram * bins)) / weight_fg
+    
+    # Varianza entre clases
+    variance_between = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+    
+    # Encontrar el umbral óptimo
+    threshold = np.argmax(variance_between)
+    
+    return threshold
+
+def binarizar(img_array, method='threshold', threshold=128):
+    """Convierte una imagen en escala de grises a matriz binaria.
+    
+    Devuelve la matriz empaquetada (MatrizBinaria) y el umbral usado
+    ('otsu' y 'mean' lo calculan)."""
+    if method == 'otsu':
+        threshold = otsu_threshold(img_array)
+    elif method == 'mean':
+        threshold = np.mean(img_array)
+    elif method != 'threshold':
+        raise ValueError(f"Método de binarización desconocido: {method}")
+    
+    binary = MatrizBinaria.desde(img_array > threshold)
+    return binary, threshold
+
+def paleta_etiquetas(n):
+    """Paleta de n colores distinguibles para etiquetas (K x 3, uint8).
+    
+    Los tonos avanzan según la razón áurea; la etiqueta 0 (fondo) es negra."""
+    tonos = (np.arange(n) * 0.618033988749895) % 1.0
+    hsv = np.empty((1, n, 3), dtype=np.uint8)
+    hsv[0, :, 0] = (tonos * 255).astype(np.uint8)
+    hsv[0, :, 1] = 200
+    hsv[0, :, 2] = 230
+    paleta = np.array(Image.fromarray(hsv, 'HSV').convert('RGB'))[0]
+    paleta[:1] = 0
+    return paleta
+
+def etiquetar_imagen(imagen):
+    """Convierte una imagen PIL en (matriz de etiquetas, paleta).
+    
+    - 'P': los índices de la paleta son las etiquetas.
+    - 'L', 'I', '1': el valor de cada píxel es el ID de clase (paleta generada).
+    - Color: cada color distinto es una etiqueta y la paleta son esos colores."""
+    if imagen.mode == 'P':
+        etiquetas = np.array(imagen)
+        paleta = np.array(imagen.getpalette(), dtype=np.uint8).reshape(-1, 3)
+        if len(paleta) <= etiquetas.max():
+            # Paleta incompleta: rellenar las entradas que faltan
+            paleta = np.vstack([paleta, paleta_etiquetas(int(etiquetas.max()) + 1)[len(paleta):]])
+        return etiquetas, paleta
+    
+    if imagen.mode in ('1', 'L', 'I', 'I;16'):
+        return np.array(imagen).astype(np.int32 if imagen.mode.startswith('I') else np.uint8), None
+    
+    rgb = np.array(imagen.convert('RGB'), dtype=np.uint32)
+    codigos = (rgb[..., 0] << 16) | (rgb[..., 1] << 8) | rgb[..., 2]
+    colores, etiquetas = np.unique(codigos, return_inverse=True)
+    etiquetas = etiquetas.reshape(codigos.shape).astype(np.int32)
+    paleta = np.stack([colores >> 16, (colores >> 8) & 0xFF, colores & 0xFF], axis=1).astype(np.uint8)
+    return etiquetas, paleta
@@ -0,0 +1,262 @@
+"""Servicio local de construcción de QuadTrees (HTTP/JSON sobre asyncio).
+
+Permite pedir binarización + construcción desde otros procesos sin abrir la
+interfaz gráfica:
+
+    python servidor.py --port 8765
+
+POST /build con un JSON:
+    {"image": "<imagen en base64>"}  o  {"path": "ruta/a/imagen.png"}
+    "method":    "threshold" | "otsu" | "mean"   (por defecto "threshold")
+    "threshold": 0-255                            (por defecto 128)
+    "output":    "stats" | "tree" | "png"         (por defecto "stats")
+
+"stats" y "tree" responden JSON ("tree" incluye el flujo progresivo en
+base64); "png" responde la imagen del QuadTree. GET /status devuelve el
+estado de la caché.
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import io
+import json
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from quadtree import QuadTree, binarizar
+
+MAX_BODY = 64 * 1024 * 1024  # Tamaño máximo del cuerpo de una petición
+METODOS = ('threshold', 'otsu', 'mean')
+SALIDAS = ('stats', 'tree', 'png')
+
+ESTADOS_HTTP = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    413: 'Payload Too Large',
+    500: 'Internal Server Error'
+}
+
+
+class ErrorPeticion(Exception):
+    """Error del cliente, se responde con el código HTTP indicado"""
+    def __init__(self, codigo, mensaje):
+        super().__init__(mensaje)
+        self.codigo = codigo
+
+
+def construir(datos_imagen, method, threshold, output):
+    """Binariza y construye el QuadTree (se ejecuta en el pool de procesos).
+
+    Devuelve (content_type, cuerpo) listo para responder."""
+    start_time = time.time()
+    imagen = Image.open(io.BytesIO(datos_imagen)).convert('L')
+    binary, threshold = binarizar(np.array(imagen), method, threshold)
+
+    quadtree = QuadTree()
+    quadtree.Construir(binary)
+    processing_time = time.time() - start_time
+
+    if output == 'png':
+        buffer = io.BytesIO()
+        quadtree.render_quadtree(quadtree.W, quadtree.H).save(buffer, format='PNG')
+        return 'image/png', buffer.getvalue()
+
+    data = {
+        'image_size': f"{quadtree.W}x{quadtree.H}",
+        'parameters': {
+            'threshold': int(threshold),
+            'binarization_method': method
+        },
+        'statistics': quadtree.get_stats(),
+        'processing_time': processing_time
+    }
+    if output == 'tree':
+        data['tree'] = base64.b64encode(quadtree.encode_progressive()).decode('ascii')
+    return 'application/json', json.dumps(data).encode('utf-8')
+
+
+class ServidorQuadTree:
+    """Servidor HTTP mínimo con caché LRU y fusión de peticiones iguales"""
+    def __init__(self, workers=None, cache_size=128):
+        self.pool = ProcessPoolExecutor(max_workers=workers)
+        self.cache = OrderedDict()   # clave -> (content_type, cuerpo)
+        self.cache_size = cache_size
+        self.en_curso = {}           # clave -> Future de la construcción
+        self.estadisticas = {'requests': 0, 'hits': 0, 'misses': 0, 'merged': 0}
+
+    async def manejar_conexion(self, reader, writer):
+        """Atiende una petición HTTP por conexión"""
+        try:
+            codigo, content_type, cuerpo, cache = await self.atender(reader)
+        except ErrorPeticion as e:
+            codigo, content_type, cache = e.codigo, 'application/json', None
+            cuerpo = json.dumps({'error': str(e)}).encode('utf-8')
+        except Exception as e:
+            codigo, content_type, cache = 500, 'application/json', None
+            cuerpo = json.dumps({'error': str(e)}).encode('utf-8')
+
+        cabeceras = [
+            f"HTTP/1.1 {codigo} {ESTADOS_HTTP[codigo]}",
+            f"Content-Type: {content_type}",
+            f"Content-Length: {len(cuerpo)}",
+            "Connection: close"
+        ]
+        if cache is not None:
+            cabeceras.append(f"X-Cache: {cache}")
+        writer.write(("\r\n".join(cabeceras) + "\r\n\r\n").encode('latin-1') + cuerpo)
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def atender(self, reader):
+        """Lee la petición y devuelve (código, content_type, cuerpo, cache)"""
+        linea = await reader.readline()
+        partes = linea.decode('latin-1').split()
+        if len(partes) != 3:
+            raise ErrorPeticion(400, "Línea de petición inválida")
+        metodo, ruta, _ = partes
+
+        cabeceras = {}
+        while True:
+            linea = await reader.readline()
+            if linea in (b'\r\n', b'\n', b''):
+                break
+            nombre, _, valor = linea.decode('latin-1').partition(':')
+            cabeceras[nombre.strip().lower()] = valor.strip()
+
+        if ruta == '/status':
+            if metodo != 'GET':
+                raise ErrorPeticion(405, "Use GET en /status")
+            estado = dict(self.estadisticas, cached=len(self.cache),
+                          in_flight=len(self.en_curso))
+            return 200, 'application/json', json.dumps(estado).encode('utf-8'), None
+
+        if ruta != '/build':
+            raise ErrorPeticion(404, f"Ruta desconocida: {ruta}")
+        if metodo != 'POST':
+            raise ErrorPeticion(405, "Use POST en /build")
+
+        try:
+            longitud = int(cabeceras.get('content-length', 0))
+        except ValueError:
+            raise ErrorPeticion(400, "Content-Length inválido")
+        if longitud < 0:
+            raise ErrorPeticion(400, "Content-Length inválido")
+        if longitud > MAX_BODY:
+            raise ErrorPeticion(413, "Petición demasiado grande")
+        try:
+            peticion = json.loads(await reader.readexactly(longitud))
+        except (ValueError, asyncio.IncompleteReadError):
+            raise ErrorPeticion(400, "El cuerpo debe ser un JSON válido")
+        if not isinstance(peticion, dict):
+            raise ErrorPeticion(400, "El cuerpo debe ser un objeto JSON")
+
+        content_type, cuerpo, cache = await self.build(peticion)
+        return 200, content_type, cuerpo, cache
+
+    async def build(self, peticion):
+        """Resuelve una petición /build desde la caché, uniéndose a una
+        construcción igual en curso o lanzando una nueva en el pool"""
+        method = peticion.get('method', 'threshold')
+        output = peticion.get('output', 'stats')
+        if method not in METODOS:
+            raise ErrorPeticion(400, f"Método inválido, use uno de {METODOS}")
+        if output not in SALIDAS:
+            raise ErrorPeticion(400, f"Salida inválida, use una de {SALIDAS}")
+        try:
+            threshold = int(peticion.get('threshold', 128))
+        except (TypeError, ValueError):
+            raise ErrorPeticion(400, "El umbral debe ser un entero")
+        if not 0 <= threshold <= 255:
+            raise ErrorPeticion(400, "El umbral debe estar entre 0 y 255")
+        if method != 'threshold':
+            threshold = 0  # Otsu y media calculan su umbral: no cambia la clave
+
+        datos_imagen = await self.leer_imagen(peticion)
+        self.estadisticas['requests'] += 1
+
+        # Clave direccionada por contenido: hash de la imagen y los parámetros
+        clave = hashlib.sha256(datos_imagen).hexdigest() + f":{method}:{threshold}:{output}"
+
+        if clave in self.cache:
+            self.cache.move_to_end(clave)
+            self.estadisticas['hits'] += 1
+            return self.cache[clave] + ('hit',)
+
+        if clave in self.en_curso:
+            # Ya se está construyendo lo mismo: esperar ese resultado
+            self.estadisticas['merged'] += 1
+            try:
+                resultado = await asyncio.shield(self.en_curso[clave])
+            except Exception as e:
+                raise ErrorPeticion(400, f"No se pudo procesar la imagen: {e}")
+            return resultado + ('merged',)
+
+        self.estadisticas['misses'] += 1
+        loop = asyncio.get_running_loop()
+        futuro = loop.run_in_executor(
+            self.pool, construir, datos_imagen, method, threshold, output
+        )
+        self.en_curso[clave] = futuro
+        try:
+            resultado = await asyncio.shield(futuro)
+        except Exception as e:
+            raise ErrorPeticion(400, f"No se pudo procesar la imagen: {e}")
+        finally:
+            del self.en_curso[clave]
+
+        self.cache[clave] = resultado
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return resultado + ('miss',)
+
+    async def leer_imagen(self, peticion):
+        """Bytes de la imagen, desde base64 o desde una ruta local"""
+        if 'image' in peticion:
+            try:
+                return base64.b64decode(peticion['image'], validate=True)
+            except (TypeError, ValueError):
+                raise ErrorPeticion(400, "'image' debe estar en base64")
+        if 'path' in peticion:
+            loop = asyncio.get_running_loop()
+            try:
+                with open(peticion['path'], 'rb') as f:
+                    return await loop.run_in_executor(None, f.read)
+            except OSError as e:
+                raise ErrorPeticion(400, f"No se pudo leer la imagen: {e}")
+        raise ErrorPeticion(400, "Falta 'image' o 'path'")
+
+
+async def main(host, port, workers, cache_size):
+    servidor = ServidorQuadTree(workers, cache_size)
+    server = await asyncio.start_server(servidor.manejar_conexion, host, port)
+    print(f"Servidor QuadTree escuchando en http://{host}:{port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        servidor.pool.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servicio local de construcción de QuadTrees")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Procesos del pool (por defecto, uno por CPU)")
+    parser.add_argument('--cache-size', type=int, default=128,
+                        help="Resultados guardados en la caché LRU")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(main(args.host, args.port, args.workers, args.cache_size))
+    except KeyboardInterrupt:
+        pass